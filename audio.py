@@ -0,0 +1,179 @@
+"""
+常驻音频会话
+============
+整个程序只打开一次麦克风：
+• 后台线程持续读取 30 ms 帧，写入预分配的环形缓冲区（默认保留最近 30 s），
+  共享的 VAD 在缓冲区上原地逐帧判决并持续自适应噪声基底；采集循环中不再分配数组或队列节点
+• 需要音频的一方（实时监听 / 单次识别）通过 `open_reader()` 取得一个读游标，关闭即退订；
+  读到的帧是缓冲区的只读 memoryview，不复制
+• 每个语音段都带上触发前的一段预录音（`pre_roll_ms`，默认 300 ms），可追溯到开始监听之前，
+  按下热键的同时开口也不会丢掉第一个字
+• 开始/停止监听只是挂上/摘下读取器，不再重建 Recognizer、重开输入流或重新校准，
+  按下热键后的下一帧即开始处理
+
+输入统一为 16 kHz / 16-bit 单声道，与离线模型和指纹缓存的要求一致。
+"""
+
+import threading
+
+import numpy as np
+import speech_recognition as sr
+
+from vad import SpeechSegmenter, VoiceActivityDetector
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+
+
+class AudioRing:
+    """
+    预分配的环形缓冲区：capacity 帧 int16 PCM 及每帧的 VAD 判决。
+    帧序号从 0 单调递增，第 n 帧存放在 n % capacity 行，在写入第 n + capacity 帧时被覆盖。
+    """
+
+    def __init__(self, frame_samples: int, capacity: int):
+        self.frame_samples = frame_samples
+        self.capacity = capacity
+        self.pcm = np.zeros((capacity, frame_samples), dtype=np.int16)
+        self.speech = np.zeros(capacity, dtype=bool)
+        self.rows = list(self.pcm)                                  # 每行的数组视图
+        self._slots = [memoryview(r).cast("B") for r in self.rows]  # 采集线程写入用
+        self.views = [m.toreadonly() for m in self._slots]          # 交给读取方
+        self.written = 0                # 已写入的帧数（下一帧的序号）
+        self.cond = threading.Condition()
+
+    def write(self, data: bytes, vad: VoiceActivityDetector):
+        """采集线程：复制一帧进对应行，原地做 VAD 判决"""
+        i = self.written % self.capacity
+        self._slots[i][:] = data
+        self.speech[i] = vad.is_speech(self.rows[i])
+        with self.cond:
+            self.written += 1
+            self.cond.notify_all()
+
+    def oldest(self) -> int:
+        """仍未被覆盖的最早帧序号"""
+        return max(0, self.written - self.capacity + 1)
+
+    def frames(self, start: int, stop: int) -> list[memoryview]:
+        return [self.views[n % self.capacity] for n in range(start, stop)]
+
+    def read(self, start: int, stop: int) -> bytes:
+        """第 start..stop-1 帧拼成的 PCM（每段只复制一次）"""
+        count = stop - start
+        if count <= 0:
+            return b""
+        a = start % self.capacity
+        head = min(count, self.capacity - a)
+        pcm = self.pcm[a:a + head].tobytes()
+        if head < count:            # 跨过缓冲区末尾
+            pcm += self.pcm[:count - head].tobytes()
+        return pcm
+
+
+class FrameReader:
+    """某个消费者在环形缓冲区上的读游标；落后超过 maxsize 帧时跳过最旧的帧，采集线程不受影响"""
+
+    def __init__(self, session: "AudioSession", maxsize: int):
+        self._session = session
+        self._ring = session.ring
+        self.maxsize = min(maxsize, self._ring.capacity // 2)
+        self.pos = self._ring.written       # 从下一帧开始读
+        self.dropped = 0
+        self.closed = False
+
+    def read(self, timeout: float = 0.1) -> tuple[memoryview, bool, int] | None:
+        """
+        返回 (帧, 是否语音, 帧序号)；超时或会话已关闭返回 None。
+        帧是缓冲区的只读视图，需在约 capacity 帧内用完（需要长期保存时复制）。
+        """
+        ring = self._ring
+        if ring.written <= self.pos:
+            with ring.cond:
+                ring.cond.wait_for(lambda: ring.written > self.pos or not self.alive, timeout)
+            if ring.written <= self.pos or self.closed:
+                return None
+        lag = ring.written - self.pos
+        if lag > self.maxsize:
+            self.dropped += lag - self.maxsize
+            self.pos = ring.written - self.maxsize
+        n = self.pos
+        self.pos += 1
+        i = n % ring.capacity
+        return ring.views[i], bool(ring.speech[i]), n
+
+    @property
+    def alive(self) -> bool:
+        return not self.closed and self._session.running
+
+    def close(self):
+        self.closed = True
+        with self._ring.cond:           # 结束另一线程中正在等待的 read()
+            self._ring.cond.notify_all()
+
+
+class AudioSession:
+    def __init__(self, device_index: int | None = None, pre_roll_ms: int = 300,
+                 buffer_s: float = 30.0):
+        """
+        pre_roll_ms : 每个语音段在触发点之前多带的音频
+        buffer_s    : 环形缓冲区时长，须大于最长语音段（15 s）加读取方可能的落后
+        """
+        self.device_index = device_index
+        self.vad = VoiceActivityDetector(SAMPLE_RATE)
+        self.frame_samples = self.vad.frame_samples
+        self.pre_roll_ms = pre_roll_ms
+        frame_ms = self.frame_samples * 1000 // SAMPLE_RATE
+        self.ring = AudioRing(self.frame_samples, int(buffer_s * 1000) // frame_ms)
+        self.error: Exception | None = None
+        self.running = False
+        self._thread: threading.Thread | None = None
+        self._ready = threading.Event()
+
+    # —— 生命周期 ────────────────────────────────────────────────────────────
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.error = None
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, name="AudioSession", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.running = False
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def wait_ready(self, timeout: float | None = None) -> bool:
+        """等到输入流已打开（或打开失败）"""
+        return self._ready.wait(timeout)
+
+    # —— 订阅 ────────────────────────────────────────────────────────────────
+    def open_reader(self, maxsize: int = 256) -> FrameReader:
+        self.start()
+        return FrameReader(self, maxsize)
+
+    def segmenter(self, **kw) -> SpeechSegmenter:
+        """在本会话的缓冲区上切分语音段（带预录音）"""
+        kw.setdefault("pre_roll_ms", self.pre_roll_ms)
+        return SpeechSegmenter(self.vad, ring=self.ring, **kw)
+
+    # —— 采集线程 ────────────────────────────────────────────────────────────
+    def _run(self):
+        ring, vad = self.ring, self.vad
+        try:
+            mic = sr.Microphone(device_index=self.device_index, sample_rate=SAMPLE_RATE)
+            with mic as source:
+                read = source.stream.read
+                self._ready.set()
+                while self.running:
+                    ring.write(read(self.frame_samples), vad)
+        except Exception as e:         # 无麦克风、设备被占用等
+            self.error = e
+        finally:
+            self.running = False
+            self._ready.set()
+            with ring.cond:            # 唤醒等待中的读取方
+                ring.cond.notify_all()
@@ -0,0 +1,345 @@
+"""
+性能基准
+========
+无需麦克风 / Windows / PyQt，直接在命令行运行：
+
+    python bench.py intents [--keys 1000] [--rounds 2000]
+    python bench.py replay  [--keys 1000] [--corpus 语料.tsv | --wav 目录] [--latency 50] [--cer 0.05]
+
+intents：内置意图 + 自定义关键词的分类，对比原先 `handle_cmd` 的逐条判断链
+与编译后的 `IntentGrammar.classify`（一次自动机扫描）。
+
+replay ：把转写语料或录好的 WAV 经“替身识别器 → 识别流水线 → CommandCore → 调度器 → 空执行器”
+完整走一遍，报告吞吐、各阶段延迟 p50/p95/p99 与匹配准确率。
+  语料格式：每行 `文本<TAB>期望`，期望为 `open:关键词`、`search:搜索词`、意图名（如 browser），
+  或留空表示不应命中任何指令；一句多条指令时用 + 连接（如 `open:微信+open:浏览器`）；WAV 的转写与期望写在同名 .txt 中（同一格式，一行）。
+  替身识别器直接返回转写，可模拟识别耗时（--latency、--rtf）和字错误率（--cer）；
+  --engine vosk --model 目录 则用真实的离线引擎识别 WAV。
+"""
+
+import argparse
+import os
+import random
+import threading
+import time
+import wave
+from typing import NamedTuple
+
+from core import CommandCore, NullExecutor
+from dispatcher import ActionDispatcher
+from foreground import FakeProvider, ForegroundService
+from intents import IntentGrammar
+from matcher import CommandMatcher
+from pipeline import RecognitionPipeline
+from tracing import Tracer
+
+SAMPLE_UTTERANCES = [
+    "搜索今天的天气", "谷歌搜索python教程", "查找附近的餐厅", "关闭当前程序", "关闭程序",
+    "关闭标签页", "打开新标签页", "刷新页面", "返回上一页", "下一页",
+    "打开微信", "打开网易云音乐", "帮我打开记事本", "今天吃什么",
+    "打开微信然后打开网易云音乐", "刷新页面再后退", "打开微信和QQ", "搜索微信和QQ的区别",
+]
+
+
+# SAMPLE_UTTERANCES 的期望结果（格式见模块说明）
+SAMPLE_EXPECTED = {
+    "搜索今天的天气": "search:今天的天气", "谷歌搜索python教程": "search:python教程",
+    "查找附近的餐厅": "search:附近的餐厅", "关闭当前程序": "close_app", "关闭程序": "close_app",
+    "关闭标签页": "browser", "打开新标签页": "browser", "刷新页面": "browser",
+    "返回上一页": "browser", "下一页": "browser",
+    "打开微信": "open:微信", "打开网易云音乐": "open:网易云音乐", "帮我打开记事本": "open:记事本",
+    "今天吃什么": "",
+    "打开微信然后打开网易云音乐": "open:微信+open:网易云音乐", "刷新页面再后退": "browser+browser",
+    "打开微信和QQ": "open:微信+open:QQ", "搜索微信和QQ的区别": "search:微信和QQ的区别",
+}
+
+
+def synthetic_keys(n: int, seed: int = 0) -> list[str]:
+    """生成 n 个互不相同、类似程序名的中文关键词"""
+    rng = random.Random(seed)
+    chars = [chr(c) for c in range(0x4E00, 0x4E00 + 3000)]
+    keys, seen = [], set()
+    while len(keys) < n:
+        k = "".join(rng.choice(chars) for _ in range(rng.randint(2, 6)))
+        if k not in seen:
+            seen.add(k)
+            keys.append(k)
+    return keys
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 原先 handle_cmd 的判断链（仅分类，不执行）
+# ────────────────────────────────────────────────────────────────────────────────
+def legacy_classify(cmd: str, custom_cmds: dict):
+    lower = cmd.lower()
+    if lower.startswith("搜索"):
+        return "search", cmd[2:].strip()
+    if lower.startswith(("谷歌搜索", "查找")):
+        return "search", cmd.replace("谷歌搜索", "").replace("查找", "").strip()
+    if "关闭当前程序" in lower or "关闭程序" in lower:
+        return "close_app", ""
+    browser_map = {
+        ("关闭标签页", "关闭网页"): ("ctrl", "w"),
+        ("新建标签页", "打开新标签页"): ("ctrl", "t"),
+        ("刷新网页", "刷新页面"): ("f5",),
+        ("后退", "返回上一页"): ("alt", "left"),
+        ("前进", "下一页"): ("alt", "right"),
+    }
+    for keys, hot in browser_map.items():
+        if any(k in lower for k in keys):
+            return "browser", ""
+    for k in custom_cmds:
+        if k.lower() in lower:
+            return "open", k
+    return None, ""
+
+
+def _timeit(fn, utterances, rounds: int) -> float:
+    t0 = time.perf_counter()
+    for i in range(rounds):
+        fn(utterances[i % len(utterances)])
+    return (time.perf_counter() - t0) / rounds
+
+
+def bench_intents(n_keys: int, rounds: int):
+    keys = synthetic_keys(n_keys)
+    custom = {k: "x.exe" for k in keys}
+    rng = random.Random(1)
+    utterances = SAMPLE_UTTERANCES + ["打开" + rng.choice(keys) for _ in range(len(SAMPLE_UTTERANCES))]
+
+    t = time.perf_counter()
+    grammar = IntentGrammar(CommandMatcher(keys))
+    build = time.perf_counter() - t
+
+    def compiled(cmd):
+        intent, value = grammar.classify(cmd)
+        return (intent.name, value) if intent else (None, "")
+
+    mismatched = [u for u in utterances if compiled(u) != legacy_classify(u, custom)]
+    legacy = _timeit(lambda u: legacy_classify(u, custom), utterances, rounds)
+    fast = _timeit(compiled, utterances, rounds)
+    print(f"意图分类  keys={n_keys}  建索引 {build * 1e3:.1f} ms")
+    print(f"  原判断链  {legacy * 1e6:10.1f} µs/句")
+    print(f"  编译语法  {fast * 1e6:10.1f} µs/句   加速 {legacy / fast:.1f}x")
+    if mismatched:
+        print(f"  与原判断链结果不同：{mismatched}")
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 回放：语料 / WAV → 替身识别器 → 流水线 → 指令核心 → 空执行器
+# ────────────────────────────────────────────────────────────────────────────────
+class Utterance(NamedTuple):
+    text: str               # 转写（替身识别器的“识别结果”）
+    expected: str           # 期望结果标签
+    audio: bytes = b""      # WAV 回放时的 PCM
+    rate: int = 0
+    width: int = 0
+
+
+def label(results) -> str:
+    """handle 的返回值 → 期望结果标签"""
+    return "+".join(_label(intent, value) for intent, value in results)
+
+
+def _label(intent, value: str) -> str:
+    if intent is None:
+        return ""
+    if intent.name in ("open", "search"):
+        return f"{intent.name}:{value}"
+    return intent.name
+
+
+def _parse_line(line: str) -> tuple[str, str]:
+    text, _, expected = line.rstrip("\r\n").partition("\t")
+    return text.strip(), expected.strip()
+
+
+def load_corpus(path: str) -> list[Utterance]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [Utterance(*_parse_line(line)) for line in f if line.strip()]
+
+
+def load_wavs(folder: str) -> list[Utterance]:
+    out = []
+    for name in sorted(os.listdir(folder)):
+        if not name.lower().endswith(".wav"):
+            continue
+        path = os.path.join(folder, name)
+        text = expected = ""
+        try:
+            with open(os.path.splitext(path)[0] + ".txt", "r", encoding="utf-8") as f:
+                text, expected = _parse_line(f.readline())
+        except OSError:
+            pass
+        with wave.open(path, "rb") as w:
+            out.append(Utterance(text, expected, w.readframes(w.getnframes()),
+                                 w.getframerate(), w.getsampwidth()))
+    return out
+
+
+def synthetic_corpus(keys: list[str], n: int, seed: int = 2) -> list[Utterance]:
+    """内置样例 + “打开<随机关键词>”"""
+    rng = random.Random(seed)
+    out = [Utterance(u, SAMPLE_EXPECTED[u]) for u in SAMPLE_UTTERANCES]
+    while len(out) < n:
+        k = rng.choice(keys)
+        out.append(Utterance(rng.choice(("打开", "启动", "")) + k, f"open:{k}"))
+    return out
+
+
+class StandInRecognizer:
+    """替身识别器：返回预先给定的转写；可模拟识别耗时与字错误"""
+    CHARS = [chr(c) for c in range(0x4E00, 0x4E00 + 3000)]
+
+    def __init__(self, latency_ms: float = 0.0, rtf: float = 0.0, cer: float = 0.0, seed: int = 0):
+        self.latency = latency_ms / 1e3
+        self.rtf = rtf                  # 每秒音频的识别耗时（秒）
+        self.cer = cer
+        self.seed = seed
+
+    def recognize(self, utt: Utterance) -> str:
+        delay = self.latency
+        if utt.audio and self.rtf:
+            delay += self.rtf * len(utt.audio) / (utt.rate * utt.width)
+        if delay:
+            time.sleep(delay)
+        if not self.cer:
+            return utt.text
+        # 按文本取种子：多线程识别时结果也可复现
+        rng = random.Random(f"{self.seed}:{utt.text}")
+        return "".join(rng.choice(self.CHARS) if rng.random() < self.cer else c for c in utt.text)
+
+
+class EngineRecognizer:
+    """用真实后端识别 WAV（需要 speech_recognition 与对应引擎）"""
+
+    def __init__(self, engine: str, model_path: str = ""):
+        import speech_recognition as sr
+        from recognizers import create_backend
+        self._sr = sr
+        self.backend = create_backend(engine, model_path)
+
+    def recognize(self, utt: Utterance) -> str:
+        return self.backend.recognize(self._sr.AudioData(utt.audio, utt.rate, utt.width))
+
+
+def bench_replay(n_keys: int, corpus: list[Utterance] | None, recognizer, workers: int,
+                 repeat: int, size: int):
+    keys = synthetic_keys(n_keys)
+    if corpus is None:
+        corpus = synthetic_corpus(keys, size)
+    custom = {k: "x.exe" for k in keys}
+    for u in corpus:                       # 语料里期望打开的关键词也要在指令表中
+        for part in u.expected.split("+"):
+            if part.startswith("open:"):
+                custom.setdefault(part[5:], "x.exe")
+    items = corpus * repeat
+
+    executor = NullExecutor()
+    dispatcher = ActionDispatcher(lambda text: None)
+    tracer = Tracer(capacity=len(items))
+    t = time.perf_counter()
+    provider = FakeProvider({4242: "chrome.exe"})       # 浏览器在前台，按键类指令照常执行
+    provider.focus(4242, "新标签页")
+    foreground = ForegroundService(provider)
+    foreground.poll()
+    core = CommandCore(custom, executor, dispatcher, speak=lambda text: None, tracer=tracer,
+                       foreground=foreground)
+    # 索引均为首次查询时惰性构建，计入建索引而非第一句的延迟
+    core.warm_index()
+    build = time.perf_counter() - t
+
+    lock = threading.Lock()
+    tally = {"correct": 0, "errors": 0}
+    wrong = []
+
+    def recognize(item):
+        utt, trace = item
+        trace.mark("queue")
+        try:
+            text = recognizer.recognize(utt)
+        except Exception as e:
+            trace.mark("recognize")
+            trace.meta["error"] = type(e).__name__
+            tracer.finish(trace)
+            raise
+        trace.mark("recognize")
+        return text, utt, trace
+
+    def on_result(result):
+        text, utt, trace = result
+        trace.mark("deliver")
+        got = label(core.handle(text, trace))
+        with lock:
+            if got == utt.expected:
+                tally["correct"] += 1
+            elif len(wrong) < 5:
+                wrong.append((utt.text, text, utt.expected, got))
+
+    def on_error(e):
+        with lock:
+            tally["errors"] += 1
+
+    # 回放不模拟丢弃：队列容纳全部语音段
+    pipeline = RecognitionPipeline(recognize, on_result, on_error, workers=workers,
+                                   maxsize=len(items) + workers)
+    pipeline.start()
+    t0 = time.perf_counter()
+    for utt in items:
+        trace = tracer.begin()
+        trace.mark("capture")
+        pipeline.submit((utt, trace))
+    pipeline.stop()
+    dispatcher.shutdown(wait=True)
+    elapsed = time.perf_counter() - t0
+
+    n = len(items)
+    print(f"回放  keys={len(custom)}  语句 {n}  建索引 {build * 1e3:.1f} ms  识别线程 {workers}")
+    print(f"  吞吐 {n / elapsed:10.1f} 句/秒   准确率 {tally['correct'] / n:.1%}"
+          f"   识别失败 {tally['errors']}   执行动作 {executor.calls}")
+    pc = tracer.percentiles((0.5, 0.95, 0.99))
+    print(f"  {'阶段':<10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage in ("queue", "recognize", "deliver", "match", "launch", "total"):
+        if stage in pc:
+            print(f"  {stage:<10}" + "".join(f"{v:10.3f}" for v in pc[stage]))
+    for src, text, expected, got in wrong:
+        print(f"  ✗ {src!r} → 识别 {text!r}  期望 {expected!r}  实际 {got!r}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="what", required=True)
+    p = sub.add_parser("intents", help="意图分类：原判断链 vs 编译语法")
+    p.add_argument("--keys", type=int, nargs="+", default=[100, 1000, 10000])
+    p.add_argument("--rounds", type=int, default=2000)
+    p = sub.add_parser("replay", help="回放语料/WAV：吞吐、延迟分位数、准确率")
+    p.add_argument("--keys", type=int, nargs="+", default=[100, 1000, 10000])
+    src = p.add_mutually_exclusive_group()
+    src.add_argument("--corpus", help="转写语料（TSV）；缺省时生成合成语料")
+    src.add_argument("--wav", help="WAV 目录（同名 .txt 为转写与期望）")
+    p.add_argument("--size", type=int, default=500, help="合成语料的语句数")
+    p.add_argument("--repeat", type=int, default=1)
+    p.add_argument("--workers", type=int, default=2, help="识别线程数")
+    p.add_argument("--latency", type=float, default=0.0, help="替身识别器每句耗时（毫秒）")
+    p.add_argument("--rtf", type=float, default=0.0, help="替身识别器每秒音频耗时（秒）")
+    p.add_argument("--cer", type=float, default=0.0, help="替身识别器字错误率")
+    p.add_argument("--engine", help="用真实后端识别 WAV（如 vosk）")
+    p.add_argument("--model", default="", help="离线模型目录")
+    args = ap.parse_args()
+    if args.what == "intents":
+        for n in args.keys:
+            bench_intents(n, args.rounds)
+    elif args.what == "replay":
+        corpus = load_corpus(args.corpus) if args.corpus else load_wavs(args.wav) if args.wav else None
+        if args.engine:
+            if not args.wav:
+                ap.error("--engine 需要配合 --wav")
+            recognizer = EngineRecognizer(args.engine, args.model)
+        else:
+            recognizer = StandInRecognizer(args.latency, args.rtf, args.cer)
+        for n in args.keys:
+            bench_replay(n, corpus, recognizer, args.workers, args.repeat, args.size)
+
+
+if __name__ == "__main__":
+    main()
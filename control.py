@@ -0,0 +1,293 @@
+"""
+本地控制接口
+============
+不经过窗口 / 托盘 / 热键，让脚本和其他工具直接驱动语音助手：
+• asyncio 服务，只监听 127.0.0.1（或 Unix 套接字）；设置令牌时连接后须先 `auth`
+• 不是 JSON 的行（包括浏览器发来的 HTTP 请求行）直接断开连接，网页无法借跨站请求下指令
+• 协议为 JSON Lines：每行一个请求，按顺序每行回一个响应；连接可长期复用，
+  也可以不等响应连续发送多行（流水线）
+• 一行也可以是请求数组（批量），整批只切换一次线程执行，响应为同样长度的数组
+
+请求 `{"id": 1, "op": "handle", "text": "打开微信"}`
+响应 `{"id": 1, "ok": true, "result": ...}` 或 `{"id": 1, "ok": false, "error": "..."}`
+
+内置操作（见 `core_handlers`）：ping、handle、list、get、set、delete、rename、metrics；
+GUI 另外提供 start、stop、status。处理函数在 `run` 指定的线程中执行（GUI 中为 Qt 主线程）。
+
+    $ printf '%s\\n' '{"op":"auth","token":"<control_token>"}' \\
+        '[{"op":"handle","text":"刷新页面"},{"op":"metrics"}]' | nc 127.0.0.1 8765
+"""
+
+import asyncio
+import hmac
+import json
+import re
+import threading
+from concurrent.futures import Future
+
+from core import CommandCore
+from tracing import Tracer
+
+DEFAULT_PORT = 8765
+MAX_LINE = 1 << 20              # 单行请求上限（字节）
+MUTATING_OPS = {"set", "delete", "rename"}      # 修改指令表的操作
+_HTTP_LINE = re.compile(rb"^[A-Z]+ \S+ HTTP/\d")
+
+
+class ControlError(Exception):
+    """请求本身有误（未知操作、缺少参数等），作为 error 回给客户端"""
+
+
+def _run_inline(fn) -> Future:
+    fut = Future()
+    try:
+        fut.set_result(fn())
+    except BaseException as e:
+        fut.set_exception(e)
+    return fut
+
+
+def _arg(req: dict, name: str):
+    try:
+        return req[name]
+    except KeyError:
+        raise ControlError(f"缺少参数 {name}") from None
+
+
+def _check_target(target, commands) -> None:
+    """set 的目标须与设置对话框能产生的形式一致：exe 路径，或 url / folder / file / macro 之一"""
+    if isinstance(target, str):
+        if not target.strip():
+            raise ControlError("目标路径不能为空")
+        return
+    if not isinstance(target, dict) or len(target) != 1:
+        raise ControlError("target 须为路径字符串，或只含 url / folder / file / macro 之一的对象")
+    (kind, value), = target.items()
+    if kind == "url":
+        if not isinstance(value, str) or not value.startswith(("http://", "https://")):
+            raise ControlError("url 须以 http:// 或 https:// 开头")
+    elif kind in ("folder", "file"):
+        if not isinstance(value, str) or not value.strip():
+            raise ControlError(f"{kind} 须为非空路径")
+    elif kind == "macro":
+        # 宏只能引用已有关键词，不能借宏夹带任意路径
+        if not isinstance(value, list) or not value or not all(isinstance(v, str) for v in value):
+            raise ControlError("macro 须为关键词列表")
+        missing = [v for v in value if v not in commands]
+        if missing:
+            raise ControlError("不存在的关键词：" + "、".join(missing))
+    else:
+        raise ControlError(f"未知的目标类型 {kind}")
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 操作
+# ────────────────────────────────────────────────────────────────────────────────
+def core_handlers(core: CommandCore, tracer: Tracer | None = None) -> dict:
+    """与界面无关的操作：op → fn(request) -> result"""
+
+    def handle(req):
+        # 远程调用默认不弹选择框：只接受使用习惯足够确定的结果
+        choose = None if req.get("interactive") else (lambda options: None)
+        text = _arg(req, "text")
+        trace = tracer.begin() if tracer is not None else None
+        if trace is not None:
+            trace.meta.update(text=text, source="control")
+        results = core.handle(text, trace, choose=choose)
+        return [{"intent": i.name if i else None, "value": v} for i, v in results]
+
+    def list_(req):
+        keys = core.matcher.filter(req.get("filter", ""))
+        limit = req.get("limit")
+        if limit is not None:
+            keys = keys[:limit]
+        return [[k, core.custom_cmds[k]] for k in keys]
+
+    def get(req):
+        key = _arg(req, "key")
+        if key not in core.custom_cmds:
+            raise ControlError(f"没有关键词 {key}")
+        return core.custom_cmds[key]
+
+    def set_(req):
+        key, target = _arg(req, "key"), _arg(req, "target")
+        if not isinstance(key, str) or not key.strip():
+            raise ControlError("key 不能为空")
+        _check_target(target, core.custom_cmds)
+        core.set_command(key, target)
+        return True
+
+    def delete(req):
+        key = _arg(req, "key")
+        if key not in core.custom_cmds:
+            raise ControlError(f"没有关键词 {key}")
+        core.delete_command(key)
+        return True
+
+    def rename(req):
+        old, new = _arg(req, "old"), _arg(req, "new")
+        try:
+            core.rename_command(old, new)
+        except KeyError as e:
+            raise ControlError(f"无法改名：{e.args[0]}") from None
+        return True
+
+    def metrics(req):
+        out = {"commands": len(core.custom_cmds)}
+        if tracer is not None:
+            out["latency_ms"] = {k: {"p50": v[0], "p95": v[1], "p99": v[2]}
+                                 for k, v in tracer.percentiles((0.5, 0.95, 0.99)).items()}
+        if core.usage is not None:
+            out["usage_records"] = len(core.usage.store)
+        return out
+
+    return {
+        "ping": lambda req: "pong",
+        "handle": handle, "list": list_, "get": get, "set": set_,
+        "delete": delete, "rename": rename, "metrics": metrics,
+    }
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 服务
+# ────────────────────────────────────────────────────────────────────────────────
+class ControlServer:
+    def __init__(self, handlers: dict, run=None, host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                 unix_path: str | None = None, token: str | None = None, on_change=None):
+        """
+        run(fn) -> concurrent.futures.Future ：在处理函数所属的线程中执行 fn()；
+        None 时直接在服务线程中执行（无界面 / 测试）
+        on_change()             : 一批请求中有修改指令表的操作时，整批结束后调用一次（如落盘）
+        """
+        self.handlers = handlers
+        self.run = run or _run_inline
+        self.on_change = on_change
+        self.host, self.port = host, port
+        self.unix_path = unix_path
+        self.token = token or None
+        self.requests = 0
+        self.connections = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._server = None
+        self._ready = threading.Event()
+        self.error: Exception | None = None
+
+    # —— 生命周期（服务在自己的线程里运行事件循环） ───────────────────────────
+    def start(self, timeout: float = 5.0):
+        threading.Thread(target=self._thread, daemon=True, name="control").start()
+        self._ready.wait(timeout)
+        if self.error:
+            raise self.error
+
+    def _thread(self):
+        loop = self._loop = asyncio.new_event_loop()
+        try:
+            if self.unix_path:
+                coro = asyncio.start_unix_server(self._client, self.unix_path, limit=MAX_LINE)
+            else:
+                coro = asyncio.start_server(self._client, self.host, self.port, limit=MAX_LINE)
+            self._server = loop.run_until_complete(coro)
+            if not self.unix_path:
+                self.port = self._server.sockets[0].getsockname()[1]     # port=0 时为实际端口
+        except OSError as e:
+            self.error = e
+            self._ready.set()
+            loop.close()
+            return
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            self._server.close()
+            clients = asyncio.all_tasks(loop)           # 仍连着的客户端
+            for task in clients:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*clients, return_exceptions=True))
+            loop.close()
+
+    def stop(self):
+        if self._loop is not None and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    # —— 连接 ────────────────────────────────────────────────────────────────
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        authed = self.token is None
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:              # 超过 MAX_LINE
+                    writer.write(self._encode({"ok": False, "error": "请求过长"}))
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                if _HTTP_LINE.match(line):      # 浏览器 / HTTP 客户端：不是本协议，直接断开
+                    break
+                try:
+                    msg = json.loads(line)
+                except ValueError:
+                    writer.write(self._encode({"ok": False, "error": "不是有效的 JSON"}))
+                    break
+                batch = isinstance(msg, list)
+                reqs = msg if batch else [msg]
+                if not authed:
+                    authed, replies = self._auth(reqs)
+                    if not authed:              # 认证失败即断开
+                        writer.write(self._encode(replies if batch else replies[0]))
+                        break
+                else:
+                    replies = await asyncio.wrap_future(self.run(lambda: self._dispatch(reqs)))
+                writer.write(self._encode(replies if batch else replies[0]))
+                await writer.drain()            # 只在发送缓冲超过高水位时真正等待
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:      # 服务停止：正常结束，不把取消状态留给 StreamReaderProtocol
+            pass
+        finally:
+            writer.close()
+
+    def _auth(self, reqs: list) -> tuple[bool, list]:
+        req = reqs[0] if reqs and isinstance(reqs[0], dict) else {}
+        token = req.get("token")
+        ok = (req.get("op") == "auth" and isinstance(token, str)
+              and hmac.compare_digest(token.encode(), self.token.encode()))
+        reply = {"id": req.get("id"), "ok": ok}
+        if not ok:
+            reply["error"] = "需要先发送 {\"op\": \"auth\", \"token\": ...}"
+        return ok, [reply] + [{"id": r.get("id") if isinstance(r, dict) else None, "ok": False,
+                               "error": "未认证"} for r in reqs[1:]]
+
+    def _dispatch(self, reqs: list) -> list:
+        """在 run 指定的线程中执行整批请求"""
+        out = []
+        changed = False
+        for req in reqs:
+            self.requests += 1
+            rid = req.get("id") if isinstance(req, dict) else None
+            try:
+                if not isinstance(req, dict):
+                    raise ControlError("请求须为对象")
+                op = req.get("op")
+                if op == "auth":
+                    result = True
+                else:
+                    fn = self.handlers.get(op)
+                    if fn is None:
+                        raise ControlError(f"未知操作 {op}")
+                    result = fn(req)
+                    changed |= op in MUTATING_OPS
+                out.append({"id": rid, "ok": True, "result": result})
+            except ControlError as e:
+                out.append({"id": rid, "ok": False, "error": str(e)})
+            except Exception as e:
+                out.append({"id": rid, "ok": False, "error": f"{type(e).__name__}: {e}"})
+        if changed and self.on_change is not None:
+            self.on_change()
+        return out
+
+    @staticmethod
+    def _encode(obj) -> bytes:
+        return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
@@ -0,0 +1,330 @@
+"""
+指令核心
+========
+从 `VoiceAssistant` 中拆出的“识别文本 → 意图 → 动作”逻辑，不依赖 Qt / Windows / 麦克风：
+• `CommandCore.handle(text)`：意图分类、同音/模糊匹配、提交动作到调度器
+• 真正的副作用（打开网页/程序、模拟按键、结束进程）由 `ActionExecutor` 完成；
+  桌面实现在 engine.py，`NullExecutor` 什么也不做，供基准测试与 Linux 上运行
+• 输出提示与“多选一”交给回调，GUI 用输出框和对话框，无界面时打印 / 取第一项
+• 可选的使用习惯（`UsageStats`）：多选一的候选按习惯排序，足够确定时直接选中，不再弹框
+• 一句话可含多条指令（“打开微信然后打开浏览器”），自定义关键词也可以是宏
+  `{"macro": [关键词或目标, ...]}`；一句话产生的所有动作一起提交：打开类动作并发执行，
+  按键/关闭程序按说话顺序串行执行
+• 可选的前台窗口服务（`ForegroundService`）：关闭程序直接取缓存的前台进程，
+  浏览器按键只在前台确实是浏览器时发送
+"""
+
+import os
+import threading
+
+from dispatcher import ActionDispatcher
+from foreground import ForegroundService
+from intents import CUSTOM, Intent, IntentGrammar
+from matcher import CommandMatcher
+from tracing import Trace, Tracer
+from usage import UsageStats
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 动作执行
+# ────────────────────────────────────────────────────────────────────────────────
+class ActionExecutor:
+    """均在调度器工作线程中调用；返回的字符串作为提示回报"""
+
+    def open_url(self, url: str):
+        raise NotImplementedError
+
+    def open_target(self, target):
+        """target：exe 路径，或 {"url"|"folder"|"file": ...}"""
+        raise NotImplementedError
+
+    def press(self, *keys: str):
+        raise NotImplementedError
+
+    def terminate(self, pid: int) -> str | None:
+        raise NotImplementedError
+
+
+class NullExecutor(ActionExecutor):
+    """不产生任何副作用，只计数"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def open_url(self, url):
+        self.calls += 1
+
+    def open_target(self, target):
+        self.calls += 1
+
+    def press(self, *keys):
+        self.calls += 1
+
+    def terminate(self, pid):
+        self.calls += 1
+
+
+def rename_macro_refs(cmds, old: str, new: str) -> list[str]:
+    """关键词改名后同步更新引用它的宏，返回被修改的宏"""
+    changed = []
+    for key, target in list(cmds.items()):
+        if isinstance(target, dict) and old in target.get("macro", ()):
+            cmds[key] = {"macro": [new if item == old else item for item in target["macro"]]}
+            changed.append(key)
+    return changed
+
+
+# 不会被“关闭程序”结束的进程（前台是桌面/任务栏时）
+PROTECTED = {"explorer.exe", "dwm.exe", "winlogon.exe", "csrss.exe"}
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 核心
+# ────────────────────────────────────────────────────────────────────────────────
+class _Call:
+    """一次 handle 调用的状态：追踪、这句话产生的动作（处理完一起提交）、多选一回调"""
+    __slots__ = ("trace", "pending", "choose")
+
+    def __init__(self, trace: Trace | None, choose):
+        self.trace = trace
+        self.pending: list = []
+        self.choose = choose
+
+
+class CommandCore:
+    def __init__(self, custom_cmds, executor: ActionExecutor, dispatcher: ActionDispatcher,
+                 speak=print, choose=None, tracer: Tracer | None = None,
+                 usage: UsageStats | None = None, foreground: ForegroundService | None = None,
+                 lazy_index: bool = False):
+        """
+        speak(text)             : 即时提示（在调用 handle 的线程中）
+        choose(options) -> key  : 模糊匹配有多个候选时让用户选；None = 取第一项
+        lazy_index              : 不在构造时读取指令表，由调用方稍后调用 build_index()（如后台启动）
+        """
+        self.custom_cmds = custom_cmds
+        self.executor = executor
+        self.dispatcher = dispatcher
+        self.speak = speak
+        self.choose = choose or (lambda options: options[0])
+        self.tracer = tracer
+        self.usage = usage
+        self.foreground = foreground        # None：不检查前台，也无法关闭前台程序
+        self.matcher = CommandMatcher(() if lazy_index else custom_cmds)
+        self.grammar = IntentGrammar(self.matcher)      # 内置意图与自定义关键词共用一个自动机
+
+    def build_index(self):
+        """读取指令表（CommandStore 在此时才加载）并建立关键词索引；内置意图规则保留"""
+        self.matcher.rebuild(self.custom_cmds)
+        self.warm_index()
+
+    def warm_index(self):
+        """
+        自动机失败指针与各 key 的拼音都在首次查询时才计算（万级 key 约 1 s），
+        在后台先查一次，第一句话不再卡住调用 handle 的线程
+        """
+        for _ in self.matcher.scan(""):
+            pass
+        self.matcher.phonetic("")
+
+    def handle(self, cmd: str, trace: Trace | None = None,
+               choose=None) -> list[tuple[Intent | None, str]]:
+        """
+        处理一句话（可含多条指令），返回每条的 (意图, 槽位/关键词)；未识别的为 (None, "")。
+        choose 仅本次替换多选一回调（如远程调用不弹对话框）。
+        """
+        # 状态都放在本次调用的 call 里：选择对话框的嵌套事件循环中可能再次进入 handle
+        call = _Call(trace, choose or self.choose)
+        try:
+            parts = self.grammar.split(cmd)
+            if len(parts) > 1:
+                self.speak(f"🧩 共 {len(parts)} 条指令：" + " / ".join(parts))
+            results = [self.handle_one(p, call) for p in parts]
+            if trace:
+                trace.mark("match")
+                trace.meta["intent"] = ",".join(i.name for i, _ in results if i)
+            self._submit_pending(call)
+            return results
+        finally:
+            # 没有交给调度器执行的指令（未识别等）到此结束
+            if call.trace is not None and self.tracer:
+                self.tracer.finish(call.trace)
+
+    def handle_one(self, cmd: str, call: "_Call") -> tuple[Intent | None, str]:
+        intent, value = self.grammar.classify(cmd)
+        if intent is None:
+            # 无精确命中：同音 / 模糊匹配
+            value = self.find_best_match(cmd.lower(), call.choose)
+            if not value:
+                self.speak("❌ 未识别此指令")
+                return None, ""
+            intent = CUSTOM
+        getattr(self, f"do_{intent.name}")(call, intent, value)
+        return intent, value
+
+    @staticmethod
+    def run_action(call: "_Call", label: str, fn, *args, serial: bool = False):
+        """
+        处理一句话期间只记下动作，处理完由 _submit_pending 一起提交；
+        serial=True 的动作（按键、关闭前台程序）依赖前台状态，按顺序串行执行。
+        """
+        call.pending.append((label, fn, args, serial))
+
+    def _submit_pending(self, call: "_Call"):
+        pending = call.pending
+        if not pending:
+            return
+        tasks = [(label, fn, args) for label, fn, args, serial in pending if not serial]
+        chain = [(fn, args) for _, fn, args, serial in pending if serial]
+        if chain:
+            labels = "、".join(label for label, *_, serial in pending if serial)
+            tasks.insert(0, (labels, self._run_chain, (chain,)))
+
+        # 当前这句话的追踪在最后一个动作执行完时结束
+        trace, call.trace = call.trace, None
+        if trace is None or self.tracer is None:
+            for label, fn, args in tasks:
+                self.dispatcher.submit(label, fn, *args)
+            return
+        tracer = self.tracer
+        remaining = [len(tasks)]
+        lock = threading.Lock()
+
+        def traced(fn):
+            def run(*a):
+                try:
+                    return fn(*a)
+                finally:
+                    with lock:
+                        remaining[0] -= 1
+                        last = remaining[0] == 0
+                    if last:
+                        trace.mark("launch")
+                        tracer.finish(trace)
+            return run
+        for label, fn, args in tasks:
+            self.dispatcher.submit(label, traced(fn), *args)
+
+    @staticmethod
+    def _run_chain(chain) -> str | None:
+        out = []
+        for fn, args in chain:
+            r = fn(*args)
+            if isinstance(r, str) and r:
+                out.append(r)
+        return "\n".join(out) or None
+
+    # —— 意图处理 --------------------------------------------------------------
+    def do_search(self, call: "_Call", intent: Intent, q: str):
+        label, url = intent.args
+        if q:
+            self.speak(f"{label}: {q}")
+            self.run_action(call, "搜索", self.executor.open_url, url.format(q))
+        else:
+            self.speak("请给出搜索内容")
+
+    def do_close_app(self, call: "_Call", intent: Intent, _):
+        # 前台窗口须在下指令的这一刻取得（读服务缓存，不查系统）
+        info = self.foreground.current() if self.foreground else None
+        if info is None:
+            self.speak("关闭失败: 无法获取前台窗口")
+            return
+        if info.pid == os.getpid() or info.name.lower() in PROTECTED:
+            self.speak(f"⚠️ 不关闭 {info.name or info.title}")
+            return
+        # 进程结束后前台窗口随之变化，由服务的下一次轮询更新
+        self.run_action(call, "关闭程序", self.executor.terminate, info.pid, serial=True)
+
+    def do_browser(self, call: "_Call", intent: Intent, _):
+        self.run_action(call, "浏览器操作", self._browser_press, intent.args, serial=True)
+
+    def _browser_press(self, keys: tuple) -> str:
+        # 执行时再看前台：同一句里前面的动作可能刚切换过窗口
+        if self.foreground is not None:
+            info = self.foreground.current()
+            if info is None:
+                return f"⚠️ 没有前台窗口，未发送 {'+'.join(keys)}"
+            if not self.foreground.is_browser(info):
+                return (f"⚠️ 前台不是浏览器（{info.name}），未发送 {'+'.join(keys)}；"
+                        f"如是浏览器，可把 {info.name} 加入设置 extra_browsers")
+        self.executor.press(*keys)
+        return "已执行浏览器操作"
+
+    def do_open(self, call: "_Call", intent: Intent, key: str):
+        target = self.custom_cmds[key]
+        if isinstance(target, dict) and "macro" in target:
+            self.do_macro(call, key, target["macro"])
+            return
+        if isinstance(target, dict):
+            if "url" in target:
+                self.speak(f"🌐 打开 {key}")
+            elif "folder" in target:
+                self.speak(f"📂 打开文件夹 {key}")
+            else:
+                self.speak(f"📄 打开文件 {key}")
+        else:
+            self.speak(f"🚀 运行 {key}")
+        self.run_action(call, key, self.executor.open_target, target)
+
+    def do_macro(self, call: "_Call", name: str, items: list):
+        """宏：各项为已有关键词，一起并发打开（不展开嵌套的宏）"""
+        targets, missing = [], []
+        for item in items:
+            # 引用的关键词已被删除时跳过，绝不把名字当成路径去启动
+            target = self.custom_cmds.get(item) if isinstance(item, str) else None
+            if target is None:
+                missing.append(str(item))
+            elif not (isinstance(target, dict) and "macro" in target):
+                targets.append((item, target))
+        self.speak(f"📦 执行宏 {name}（{len(targets)} 项）")
+        if missing:
+            self.speak(f"⚠️ 宏 {name} 引用的关键词已不存在：" + "、".join(missing))
+        for label, target in targets:
+            self.run_action(call, label, self.executor.open_target, target)
+
+    # —— 指令表维护（存储与索引保持一致） ---------------------------------------
+    def set_command(self, key: str, target):
+        self.custom_cmds[key] = target
+        self.matcher.add(key)               # 已有 key 时位置不变
+
+    def delete_command(self, key: str):
+        del self.custom_cmds[key]
+        self.matcher.remove(key)
+
+    def rename_command(self, old: str, new: str):
+        cmds = self.custom_cmds
+        if hasattr(cmds, "rename"):         # CommandStore：单条日志记录
+            cmds.rename(old, new)
+        elif old not in cmds or new in cmds:
+            raise KeyError(new if old in cmds else old)
+        else:
+            cmds[new] = cmds.pop(old)
+        self.matcher.rename(old, new)
+        rename_macro_refs(cmds, old, new)
+
+    # —— 工具：最佳匹配 --------------------------------------------------------
+    def find_best_match(self, cmd: str, choose=None):
+        choose = choose or self.choose
+        key = self.matcher.substring_hit(cmd)
+        if key is not None:
+            return key
+        # 同音（识别结果常把“微信”写成“微心”）直接选中；近音只作为候选
+        key, matches = self.matcher.phonetic(cmd, n=3)
+        if key is not None:
+            return key
+        matches += [k for k in self.matcher.close_matches(cmd, n=3, cutoff=0.4)
+                    if k not in matches]
+        matches = matches[:3]
+        if not matches:
+            return None
+        if self.usage is None:
+            return choose(matches)
+        # 按使用习惯排序；同一句话反复选同一个时直接选中
+        matches = self.usage.rank(cmd, matches)
+        key = self.usage.pick(cmd, matches)
+        if key is not None:
+            self.speak(f"🧠 按使用习惯选择：{key}")
+        else:
+            key = choose(matches)
+        if key:
+            self.usage.record(cmd, key)
+        return key
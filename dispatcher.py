@@ -0,0 +1,61 @@
+"""
+指令执行调度器
+==============
+打开网页/程序/文件、模拟按键、结束进程等动作都可能卡住（启动器慢、进程多），
+不应在 GUI 线程里同步执行：
+• 动作提交到线程池执行，GUI 线程立即返回，继续处理下一句识别结果
+• 每个动作有超时，从开始执行时计时（排队等待空闲线程的时间不算）；
+  超时后先回报“执行超时”，动作本身结束后的结果不再回报
+• 动作返回的提示文本 / 抛出的异常通过 notify 回调送回（由调用方转到 GUI 线程）
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class ActionDispatcher:
+    def __init__(self, notify, workers: int = 4, timeout: float = 10.0, initializer=None):
+        """notify(text) 在工作线程中被调用，调用方负责线程切换（如 Qt 信号）"""
+        self.notify = notify
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="action",
+                                        initializer=initializer)
+
+    def submit(self, label: str, fn, *args, timeout: float | None = None) -> Future:
+        """fn(*args) 返回的字符串作为提示回报（其他返回值忽略）；label 用于超时提示"""
+        timeout = self.timeout if timeout is None else timeout
+        lock = threading.Lock()
+        reported = [False]
+
+        def report(text: str | None):
+            with lock:
+                if reported[0]:
+                    return
+                reported[0] = True
+            if isinstance(text, str) and text:
+                self.notify(text)
+
+        def on_timeout():
+            report(f"⏱️ {label} 执行超时（{timeout:g} 秒）")
+
+        timer = threading.Timer(timeout, on_timeout)
+        timer.daemon = True
+
+        def on_done(fut: Future):
+            timer.cancel()
+            if fut.cancelled():
+                return
+            e = fut.exception()
+            report(f"⚠️ 执行失败: {e}" if e else fut.result())
+
+        def run():
+            timer.start()               # 在工作线程中开始计时，不把排队时间算进去
+            return fn(*args)
+
+        fut = self._pool.submit(run)
+        fut.add_done_callback(on_done)
+        return fut
+
+    def shutdown(self, wait: bool = False):
+        """wait=False：丢弃尚未开始的动作立即返回；wait=True：等全部动作执行完"""
+        self._pool.shutdown(wait=wait, cancel_futures=not wait)
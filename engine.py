@@ -2,77 +2,465 @@
 Voice Assistant (Python + PyQt5 版)
 ==================================
 功能一览
-• 语音识别（Google Web API，含实时监听 & 单次识别）
+• 语音识别（Google Web API / Vosk 离线流式，含实时监听 & 单次识别）
 • 自然语言指令：搜索、浏览器标签控制、关闭前台程序等
-• 自定义关键词映射（程序/网址/文件夹/文件） + 开始菜单一键导入
-• 系统托盘图标（显示/隐藏窗口、开始/停止监听、退出）
+• 自定义关键词映射（程序/网址/文件夹/文件/宏） + 开始菜单一键导入
+• 一句话多条指令（“打开微信然后打开浏览器”），宏一次并发打开一组目标
+• 唤醒词模式：本地常驻检测唤醒词，只把其后的一句送去识别
+• 系统托盘图标（显示/隐藏窗口、监听 / 唤醒词 / 停止三种状态、退出）
 • 全局热键（默认 F8，可在设置里修改，实时生效）
+• 本地控制接口（JSON Lines，见 control.py）：脚本可发送文字指令、开始/停止监听、
+  增删改关键词、读取延迟统计；默认关闭，在 QSettings 中设置 control_port 后开启，
+  令牌取自 control_token（未设置时自动生成并保存），连接后须先 auth
+• 浏览器按键只发给浏览器：内置常见浏览器，其他浏览器的进程名写在 QSettings 的 extra_browsers
+  （逗号分隔，如 "arc.exe, thorium.exe"）
+
+启动：窗口先显示，指令表（读取与建索引）、托盘、热键、麦克风与识别引擎随后在后台启动；
+pyautogui / speech_recognition / pywin32 / keyboard / pystray / PIL / psutil / numpy / pypinyin
+都推迟到首次使用时导入。每次启动的各阶段耗时写入 startup_times.jsonl，
+`python engine.py --startup-report` 打印本次耗时（JSON）后退出，便于发现启动变慢。
 """
 
-import sys, os, json, webbrowser, difflib, threading, ctypes, psutil
-import pyautogui, speech_recognition as sr, pythoncom, win32com.client
-import win32gui, win32process, keyboard, pystray
-from pystray import MenuItem as TrayItem
-from PIL import Image, ImageDraw
+import sys, os, time, webbrowser, threading, ctypes, json
+from concurrent.futures import Future
+from typing import TYPE_CHECKING
+
+_T0 = time.perf_counter()              # 启动计时起点
+
 from PyQt5 import QtCore, QtGui, QtWidgets
 
+from core import ActionExecutor, CommandCore, rename_macro_refs
+from dispatcher import ActionDispatcher
+from matcher import HAS_PINYIN, CommandMatcher, to_syllables
+from pipeline import RecognitionPipeline
+from startmenu import StartMenuScanner
+from store import CommandStore
+from tracing import Trace, Tracer
+from usage import UsageStats
+
+if TYPE_CHECKING:
+    import speech_recognition as sr
+    from audio import AudioSession
+    from control import ControlServer
+    from recognizers import RecognizerBackend
+
+_T_IMPORTS = time.perf_counter()
+
 CONFIG_FILE = "command_map.json"
+LNK_CACHE_FILE = "lnk_cache.json"     # 开始菜单快捷方式解析缓存
+TRACE_FILE = "latency_trace"          # 导出延迟追踪：.json（Chrome Trace）与 .jsonl
+STARTUP_LOG = "startup_times.jsonl"   # 每次启动的各阶段耗时
+USAGE_FILE = "usage_stats.json"       # 模糊匹配的选择习惯
 
 
 # ────────────────────────────────────────────────────────────────────────────────
 # 实用线程：后台语音监听
 # ────────────────────────────────────────────────────────────────────────────────
 class SpeechThread(QtCore.QThread):
-    recognized = QtCore.pyqtSignal(str)
+    WORKERS = 2                           # 并行识别线程数
+    WAKE_WINDOW = 5.0                     # 唤醒后等待指令的秒数
+    WAKE_TAIL_MS = 400                    # 唤醒词后紧接着说的内容超过此长度即视为同一句里的指令
+
+    recognized = QtCore.pyqtSignal(str, object)   # 文本, Trace
+    partial = QtCore.pyqtSignal(str)      # 流式后端的中间结果
     status_msg = QtCore.pyqtSignal(str)
+    failed = QtCore.pyqtSignal(str)       # 无法开始（如唤醒词模型不可用）
 
-    def __init__(self):
+    def __init__(self, backend: "RecognizerBackend", session: "AudioSession", tracer: Tracer,
+                 wake_phrases: list[str] | None = None, model_path: str = ""):
+        """wake_phrases 非空时为唤醒词模式（检测器用 model_path 下的 Vosk 模型）"""
         super().__init__()
         self._running = True
-        self.recognizer = sr.Recognizer()
-        self.mic = sr.Microphone()
+        self.backend = backend
+        self.session = session
+        self.tracer = tracer
+        self.wake_phrases = wake_phrases
+        self.model_path = model_path
+        self.spotter = None
+        self.pipeline: RecognitionPipeline | None = None
+        self.segmenter = session.segmenter()       # 语音段带触发前的预录音
 
     def run(self):
-        with self.mic as source:
-            self.recognizer.adjust_for_ambient_noise(source)
-            while self._running:
-                try:
+        if self.wake_phrases:
+            # 模型加载可能要几秒，放在线程里做
+            from wakeword import SpotterUnavailable, WakeWordSpotter
+            try:
+                self.spotter = WakeWordSpotter(self.model_path, self.wake_phrases)
+            except SpotterUnavailable as e:
+                self.failed.emit(f"⚠️ {e}")
+                return
+        # 常驻会话的输入流与噪声基底一直保持，这里只需挂上读取器
+        self.reader = self.session.open_reader()
+        try:
+            if self.spotter:
+                self.status_msg.emit("等待唤醒词…")
+                self.wake_loop()
+            elif self.backend.streaming:
+                self.status_msg.emit("监听中…")
+                self.stream_loop()
+            else:
+                self.status_msg.emit("监听中…")
+                self.listen_loop()
+        finally:
+            self.reader.close()
+        if self.session.error:
+            self.status_msg.emit(f"麦克风不可用: {self.session.error}")
+
+    def frames(self):
+        """逐帧产出 (事件, 帧列表)，停止监听或会话结束时退出"""
+        while self._running and self.reader.alive:
+            item = self.reader.read()
+            if item is not None:
+                yield self.segmenter.push(*item)
+
+    # —— 整句识别：VAD 切段 → 队列 → 识别线程池 ─────────────────────────────
+    def listen_loop(self):
+        import speech_recognition as sr
+        from audio import SAMPLE_RATE, SAMPLE_WIDTH
+        self.pipeline = RecognitionPipeline(
+            self.recognize, self.on_result, self.on_error, workers=self.WORKERS
+        )
+        self.pipeline.start()
+        seg, t0, trace = self.segmenter, 0.0, None
+        try:
+            for event, _ in self.frames():
+                if event == "start":
+                    t0 = time.perf_counter()
+                    trace = self.tracer.begin()
+                    self.status_msg.emit("录音中…")
+                elif event == "end":
+                    if seg.segment:     # 过短的段（噪声）不送识别
+                        trace.mark("capture")
+                        audio = sr.AudioData(seg.segment, SAMPLE_RATE, SAMPLE_WIDTH)
+                        self.pipeline.submit((audio, trace), time.perf_counter() - t0)
                     self.status_msg.emit("监听中…")
-                    audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=5)
-                    text = self.recognizer.recognize_google(audio, language="zh-CN")
-                    self.recognized.emit(text)
-                    self.status_msg.emit("识别成功")
-                except sr.WaitTimeoutError:
+        finally:
+            self.pipeline.stop()          # 已采集的语音段识别完再退出
+
+    # —— 唤醒词：常驻检测，命中后只把随后的一句送完整识别 ──────────────────
+    def wake_loop(self):
+        import speech_recognition as sr
+        from audio import SAMPLE_RATE, SAMPLE_WIDTH
+        self.pipeline = RecognitionPipeline(
+            self.recognize, self.on_result, self.on_error, workers=1
+        )
+        self.pipeline.start()
+        seg, spotter = self.segmenter, self.spotter
+        armed_until = 0.0               # 已唤醒、等待指令的截止时间
+        command = False                 # 当前语音段是否为唤醒后的指令
+        n = hit = 0                     # 本段已有帧数 / 检测到唤醒词时的帧数
+        trace, t0 = None, 0.0
+
+        def submit(pcm: bytes):
+            trace.mark("capture")
+            audio = sr.AudioData(pcm, SAMPLE_RATE, SAMPLE_WIDTH)
+            self.pipeline.submit((audio, trace), time.perf_counter() - t0)
+
+        try:
+            for event, frames in self.frames():
+                if event is None:
+                    if armed_until and time.monotonic() > armed_until:
+                        armed_until = 0.0
+                        self.status_msg.emit("等待唤醒词…")
+                    continue
+                if event == "start":
+                    command, n, hit = bool(armed_until), 0, 0
+                    t0 = time.perf_counter()
+                    trace = self.tracer.begin()
+                    if command:
+                        self.status_msg.emit("录音中…")
+                if not command and not hit:
+                    for i, f in enumerate(frames, n + 1):
+                        if spotter.feed(f):
+                            hit = i
+                            self.status_msg.emit("已唤醒，请说指令…")
+                            break
+                n += len(frames)
+                if event != "end":
                     continue
-                except sr.UnknownValueError:
-                    self.status_msg.emit("无法识别语音")
-                except sr.RequestError:
-                    self.status_msg.emit("识别服务出错")
+                spotter.reset()
+                if command:
+                    armed_until = 0.0
+                    if seg.segment:
+                        submit(seg.segment)
+                    self.status_msg.emit("等待唤醒词…")
+                elif hit:
+                    size = len(frames[0])
+                    tail = seg.segment[hit * size:] if seg.segment else b""
+                    spoken = len(tail) - seg.end_frames * size      # 去掉段尾静音
+                    if spoken * 1000 // (SAMPLE_RATE * SAMPLE_WIDTH) >= self.WAKE_TAIL_MS:
+                        submit(tail)        # “小助手打开微信”一口气说完
+                        self.status_msg.emit("等待唤醒词…")
+                    else:
+                        armed_until = time.monotonic() + self.WAKE_WINDOW
+        finally:
+            self.pipeline.stop()
+
+    def recognize(self, item) -> tuple[str, Trace]:
+        # 识别线程中执行
+        audio, trace = item
+        trace.mark("queue")
+        try:
+            text = self.backend.recognize(audio)
+            if self.spotter:
+                text = self.spotter.strip(text)
+                if not text:
+                    import speech_recognition as sr
+                    raise sr.UnknownValueError()
+        except Exception as e:
+            trace.mark("recognize")
+            trace.meta["error"] = type(e).__name__
+            self.tracer.finish(trace)
+            raise
+        trace.mark("recognize")
+        return text, trace
+
+    def on_result(self, result: tuple[str, Trace]):
+        self.recognized.emit(*result)
+        self.status_msg.emit("识别成功")
+
+    def on_error(self, e: Exception):
+        import speech_recognition as sr
+        if isinstance(e, sr.UnknownValueError):
+            self.status_msg.emit("无法识别语音")
+        else:
+            self.status_msg.emit("识别服务出错")
+
+    def stats(self) -> dict:
+        """流水线统计（队列深度、各阶段耗时）；流式后端无流水线时为空"""
+        return self.pipeline.stats.snapshot() if self.pipeline else {}
+
+    # —— 流式识别：只把 VAD 判定的语音帧逐块送入解码器 ──────────────────────
+    def stream_loop(self):
+        stream, last, trace = None, "", None
+        for event, frames in self.frames():
+            if event == "start":
+                stream, last = self.backend.stream(), ""
+                trace = self.tracer.begin()
+                self.status_msg.emit("录音中…")
+            if stream is None:
+                continue
+            for f in frames:
+                text, _ = stream.feed(f)
+                if text and text != last:
+                    last = text
+                    self.partial.emit(text)
+            if event == "end":
+                trace.mark("capture")
+                text, stream = stream.finish(), None
+                trace.mark("recognize")
+                if text:
+                    self.recognized.emit(text, trace)
+                    self.status_msg.emit("识别成功")
+                else:
+                    self.status_msg.emit("监听中…")
 
     def stop(self):
         self._running = False
 
 
+# ────────────────────────────────────────────────────────────────────────────────
+# 单次识别任务（线程池中运行，可取消）
+# ────────────────────────────────────────────────────────────────────────────────
+class SpeechOnceSignals(QtCore.QObject):
+    status = QtCore.pyqtSignal(str)
+    done = QtCore.pyqtSignal(str)       # 识别文本
+    failed = QtCore.pyqtSignal(str)     # 提示信息
+    finished = QtCore.pyqtSignal()
+
+
+class SpeechOnceTask(QtCore.QRunnable):
+    TIMEOUT = 5.0                       # 多久未检测到语音即放弃（秒）
+
+    def __init__(self, backend: "RecognizerBackend", session: "AudioSession"):
+        super().__init__()
+        self.backend = backend
+        self.session = session          # 复用常驻输入流与已适应的噪声基底
+        self.signals = SpeechOnceSignals()
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def run(self):
+        import speech_recognition as sr
+        try:
+            self.signals.status.emit("开始说话…")
+            audio = self.capture()
+            if audio is None or self._cancel.is_set():
+                return
+            self.signals.status.emit("识别中…")
+            text = self.backend.recognize(audio)
+            if not self._cancel.is_set():
+                self.signals.done.emit(text)
+        except sr.UnknownValueError:
+            self.signals.failed.emit("❓ 无法识别")
+        except sr.RequestError:
+            self.signals.failed.emit("⚠️ 服务出错")
+        finally:
+            self.signals.finished.emit()
+
+    def capture(self) -> "sr.AudioData | None":
+        import speech_recognition as sr
+        from audio import SAMPLE_RATE, SAMPLE_WIDTH
+        seg = self.session.segmenter()
+        deadline = time.monotonic() + self.TIMEOUT
+        reader = self.session.open_reader()
+        try:
+            while not self._cancel.is_set() and reader.alive:
+                item = reader.read()
+                if item is not None:
+                    event, _ = seg.push(*item)
+                    if event == "end" and seg.segment:
+                        return sr.AudioData(seg.segment, SAMPLE_RATE, SAMPLE_WIDTH)
+                if not seg.triggered and time.monotonic() > deadline:
+                    self.signals.failed.emit("⏰ 未检测到语音")
+                    return None
+        finally:
+            reader.close()
+        if self.session.error:
+            self.signals.failed.emit(f"⚠️ 麦克风不可用: {self.session.error}")
+        return None
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 开始菜单扫描线程
+# ────────────────────────────────────────────────────────────────────────────────
+class StartMenuImportThread(QtCore.QThread):
+    progress = QtCore.pyqtSignal(int, int)       # 已处理, 总数
+    scanned = QtCore.pyqtSignal(list)            # [(程序名, exe 路径)]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.cancel = threading.Event()
+
+    def run(self):
+        scanner = StartMenuScanner(LNK_CACHE_FILE)
+        result = scanner.scan(progress=self.progress.emit, cancel=self.cancel)
+        try:
+            scanner.save_cache()
+        except OSError:
+            pass
+        self.scanned.emit(result)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 指令列表模型（只为可见行生成显示文本，增删改名按行通知视图）
+# ────────────────────────────────────────────────────────────────────────────────
+class CommandListModel(QtCore.QAbstractListModel):
+    KeyRole = QtCore.Qt.UserRole
+
+    def __init__(self, command_map: CommandStore, matcher: CommandMatcher, parent=None):
+        super().__init__(parent)
+        self.command_map = command_map
+        self.matcher = matcher
+        self.filter_text = ""
+        self.keys: list[str] = list(command_map)
+
+    @staticmethod
+    def describe(k: str, v) -> str:
+        if isinstance(v, dict):
+            if "macro" in v:
+                return f"[宏] {k}  →  " + "、".join(map(str, v["macro"]))
+            if "url" in v:
+                return f"[网页] {k}  →  {v['url']}"
+            if "folder" in v:
+                return f"[文件夹] {k}  →  {v['folder']}"
+            return f"[文件] {k}  →  {v['file']}"
+        return f"[程序] {k}  →  {v}"
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.keys)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        key = self.keys[index.row()]
+        if role == QtCore.Qt.DisplayRole:
+            return self.describe(key, self.command_map.get(key))
+        if role == self.KeyRole:
+            return key
+        return None
+
+    # —— 过滤 ────────────────────────────────────────────────────────────────
+    def set_filter(self, text: str):
+        self.beginResetModel()
+        self.filter_text = text.strip()
+        self.keys = self.matcher.filter(self.filter_text)
+        self.endResetModel()
+
+    def _visible(self, key: str) -> bool:
+        return self.filter_text.lower() in key.lower()
+
+    # —— 增量更新 ────────────────────────────────────────────────────────────
+    def add_keys(self, keys: list[str]):
+        keys = [k for k in keys if self._visible(k)]
+        if not keys:
+            return
+        n = len(self.keys)
+        self.beginInsertRows(QtCore.QModelIndex(), n, n + len(keys) - 1)
+        self.keys.extend(keys)
+        self.endInsertRows()
+
+    def remove_key(self, key: str):
+        try:
+            row = self.keys.index(key)
+        except ValueError:
+            return
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        del self.keys[row]
+        self.endRemoveRows()
+
+    def update_key(self, key: str):
+        try:
+            row = self.keys.index(key)
+        except ValueError:
+            return
+        idx = self.index(row)
+        self.dataChanged.emit(idx, idx, [QtCore.Qt.DisplayRole])
+
+    def rename_key(self, old: str, new: str):
+        # 与存储一致：改名后的 key 排到末尾
+        self.remove_key(old)
+        self.add_keys([new])
+
+
 # ────────────────────────────────────────────────────────────────────────────────
 # 设置/指令管理对话框
 # ────────────────────────────────────────────────────────────────────────────────
 class SettingsDialog(QtWidgets.QDialog):
-    def __init__(self, command_map: dict, current_hotkey: str, save_cb, parent=None):
+    def __init__(self, command_map: CommandStore, current_hotkey: str, save_cb,
+                 matcher: CommandMatcher | None = None, engine: str = "google",
+                 model_path: str = "", wake_phrase: str = "", parent=None):
         super().__init__(parent)
         self.setWindowTitle("设置 / 指令管理")
         self.resize(420, 480)
         self.command_map = command_map
+        self.matcher = matcher if matcher is not None else CommandMatcher(command_map)
         self.current_hotkey = current_hotkey
+        self.current_engine = engine
+        self.current_model = model_path
+        self.current_wake = wake_phrase
         self.save_cb = save_cb
+        self.import_thread: StartMenuImportThread | None = None
         self.init_ui()
 
     # —— UI 组件 ────────────────────────────────────────────────────────────────
     def init_ui(self):
         main = QtWidgets.QVBoxLayout(self)
 
-        # 指令列表
-        self.list_widget = QtWidgets.QListWidget()
-        main.addWidget(self.list_widget, stretch=1)
+        # 过滤框 + 指令列表
+        self.filter_edit = QtWidgets.QLineEdit()
+        self.filter_edit.setPlaceholderText("过滤关键词…")
+        self.filter_edit.setClearButtonEnabled(True)
+        main.addWidget(self.filter_edit)
+
+        self.model = CommandListModel(self.command_map, self.matcher, self)
+        self.list_view = QtWidgets.QListView()
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setModel(self.model)
+        self.filter_edit.textChanged.connect(self.model.set_filter)
+        main.addWidget(self.list_view, stretch=1)
 
         # 按钮条
         btn_bar = QtWidgets.QHBoxLayout()
@@ -94,6 +482,31 @@ class SettingsDialog(QtWidgets.QDialog):
         hotkey_box.addWidget(self.hotkey_edit)
         main.addLayout(hotkey_box)
 
+        # 识别引擎
+        engine_box = QtWidgets.QHBoxLayout()
+        engine_box.addWidget(QtWidgets.QLabel("识别引擎："))
+        self.engine_combo = QtWidgets.QComboBox()
+        from recognizers import BACKENDS
+        for name, label in BACKENDS.items():
+            self.engine_combo.addItem(label, name)
+        self.engine_combo.setCurrentIndex(max(0, self.engine_combo.findData(self.current_engine)))
+        engine_box.addWidget(self.engine_combo)
+        self.model_edit = QtWidgets.QLineEdit(self.current_model)
+        self.model_edit.setPlaceholderText("离线模型目录")
+        engine_box.addWidget(self.model_edit)
+        btn_model = QtWidgets.QPushButton("…")
+        btn_model.clicked.connect(self.pick_model)
+        engine_box.addWidget(btn_model)
+        main.addLayout(engine_box)
+
+        # 唤醒词（检测使用上面的离线模型）
+        wake_box = QtWidgets.QHBoxLayout()
+        wake_box.addWidget(QtWidgets.QLabel("唤醒词："))
+        self.wake_edit = QtWidgets.QLineEdit(self.current_wake)
+        self.wake_edit.setPlaceholderText("多个用逗号分隔，需要 Vosk 离线模型")
+        wake_box.addWidget(self.wake_edit)
+        main.addLayout(wake_box)
+
         # OK / Cancel
         btns = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Ok
                                           | QtWidgets.QDialogButtonBox.Cancel)
@@ -101,22 +514,9 @@ class SettingsDialog(QtWidgets.QDialog):
         btns.rejected.connect(self.reject)
         main.addWidget(btns)
 
-        self.refresh_list()
-
-    # —— 列表刷新 ────────────────────────────────────────────────────────────
-    def refresh_list(self):
-        self.list_widget.clear()
-        for k, v in self.command_map.items():
-            if isinstance(v, dict):
-                if "url" in v:
-                    show = f"[网页] {k}  →  {v['url']}"
-                elif "folder" in v:
-                    show = f"[文件夹] {k}  →  {v['folder']}"
-                else:
-                    show = f"[文件] {k}  →  {v['file']}"
-            else:
-                show = f"[程序] {k}  →  {v}"
-            self.list_widget.addItem(show)
+    def current_key(self) -> str | None:
+        idx = self.list_view.currentIndex()
+        return idx.data(CommandListModel.KeyRole) if idx.isValid() else None
 
     # —— 添加指令 ────────────────────────────────────────────────────────────
     def add_cmd(self):
@@ -125,7 +525,7 @@ class SettingsDialog(QtWidgets.QDialog):
             return
 
         typ, ok = QtWidgets.QInputDialog.getItem(
-            self, "类型", "选择类型：", ["程序", "网址", "文件夹", "文件"], 0, False
+            self, "类型", "选择类型：", ["程序", "网址", "文件夹", "文件", "宏（批量打开）"], 0, False
         )
         if not ok:
             return
@@ -143,71 +543,156 @@ class SettingsDialog(QtWidgets.QDialog):
             folder = QtWidgets.QFileDialog.getExistingDirectory(self, "选择文件夹")
             if folder:
                 result = {"folder": folder}
+        elif typ.startswith("宏"):
+            text, ok = QtWidgets.QInputDialog.getText(self, "宏", "要一起打开的关键词（逗号分隔）：")
+            items = [t.strip() for t in text.replace("，", ",").split(",") if t.strip()]
+            missing = [t for t in items if t not in self.command_map]
+            if missing:
+                QtWidgets.QMessageBox.warning(self, "提示", "不存在的关键词：" + "、".join(missing))
+            elif ok and items:
+                result = {"macro": items}
         else:
             f, _ = QtWidgets.QFileDialog.getOpenFileName(self, "选择文件")
             if f:
                 result = {"file": f}
 
         if result:
+            existed = kw in self.command_map
             self.command_map[kw] = result
+            self.matcher.add(kw)
             self.save_cb()
-            self.refresh_list()
+            if existed:
+                self.model.update_key(kw)
+            else:
+                self.model.add_keys([kw])
 
     # —— 删除 / 重命名 ──────────────────────────────────────────────────────
     def del_cmd(self):
-        item = self.list_widget.currentItem()
-        if not item:
-            return
-        key = item.text().split("  →")[0].split("] ")[-1]
-        if key in self.command_map:
+        key = self.current_key()
+        if key is not None and key in self.command_map:
             del self.command_map[key]
+            self.matcher.remove(key)
             self.save_cb()
-            self.refresh_list()
+            self.model.remove_key(key)
 
     def rename_cmd(self):
-        item = self.list_widget.currentItem()
-        if not item:
+        old = self.current_key()
+        if old is None:
             return
-        old = item.text().split("  →")[0].split("] ")[-1]
         new, ok = QtWidgets.QInputDialog.getText(self, "重命名", f"将“{old}”改为：")
         if ok and new and new not in self.command_map:
-            self.command_map[new] = self.command_map.pop(old)
+            self.command_map.rename(old, new)
+            self.matcher.rename(old, new)
+            refs = rename_macro_refs(self.command_map, old, new)
             self.save_cb()
-            self.refresh_list()
+            self.model.rename_key(old, new)
+            for key in refs:
+                self.model.update_key(key)
 
     # —— 开始菜单导入 ───────────────────────────────────────────────────────
     def import_start_menu(self):
-        added = 0
-        shell = win32com.client.Dispatch("WScript.Shell")
-        for base in [
-            os.path.expandvars(r"%APPDATA%\Microsoft\Windows\Start Menu\Programs"),
-            r"C:\ProgramData\Microsoft\Windows\Start Menu\Programs",
-        ]:
-            for root, _, files in os.walk(base):
-                for f in files:
-                    if f.endswith(".lnk"):
-                        lnk = os.path.join(root, f)
-                        try:
-                            sc = shell.CreateShortcut(lnk)
-                            target = sc.Targetpath
-                            if target.lower().endswith(".exe"):
-                                name = os.path.splitext(f)[0]
-                                if name not in self.command_map:
-                                    self.command_map[name] = target
-                                    added += 1
-                        except Exception:
-                            pass
+        # 后台线程池解析快捷方式，对话框保持响应
+        self.import_dlg = QtWidgets.QProgressDialog("正在扫描开始菜单…", "取消", 0, 0, self)
+        self.import_dlg.setWindowModality(QtCore.Qt.WindowModal)
+        self.import_dlg.setMinimumDuration(0)     # 立即模态显示，扫描期间不能关闭设置对话框
+        self.import_thread = StartMenuImportThread(self)
+        self.import_thread.progress.connect(self.on_import_progress)
+        self.import_thread.scanned.connect(self.on_import_done)
+        self.import_dlg.canceled.connect(self.import_thread.cancel.set)
+        self.import_thread.start()
+
+    def on_import_progress(self, done: int, total: int):
+        self.import_dlg.setMaximum(total)
+        self.import_dlg.setValue(done)
+
+    def on_import_done(self, result: list):
+        self.import_dlg.reset()
+        self.import_thread.wait()
+        cancelled = self.import_thread.cancel.is_set()
+        self.import_thread = None
+        if cancelled:               # 只扫描了一部分，不导入
+            QtWidgets.QMessageBox.information(self, "提示", "已取消导入")
+            return
+        added = []
+        for name, target in result:
+            if name not in self.command_map:
+                self.command_map[name] = target
+                self.matcher.add(name)
+                added.append(name)
         if added:
-            QtWidgets.QMessageBox.information(self, "成功", f"导入 {added} 个程序")
             self.save_cb()
-            self.refresh_list()
+            self.model.add_keys(added)
+            QtWidgets.QMessageBox.information(self, "成功", f"导入 {len(added)} 个程序")
         else:
             QtWidgets.QMessageBox.information(self, "提示", "未发现新程序")
 
+    def done(self, r: int):
+        # 扫描线程以本对话框为父对象：关闭前先让它结束
+        if self.import_thread is not None:
+            self.import_thread.cancel.set()
+            self.import_thread.wait()
+        super().done(r)
+
     # —— 热键获取 ───────────────────────────────────────────────────────────
     def get_hotkey(self) -> str:
         return self.hotkey_edit.text().strip()
 
+    # —— 识别引擎 ───────────────────────────────────────────────────────────
+    def pick_model(self):
+        folder = QtWidgets.QFileDialog.getExistingDirectory(self, "选择离线模型目录")
+        if folder:
+            self.model_edit.setText(folder)
+
+    def get_engine(self) -> tuple[str, str]:
+        return self.engine_combo.currentData(), self.model_edit.text().strip()
+
+    def get_wake_phrase(self) -> str:
+        return self.wake_edit.text().strip()
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 桌面动作执行（Windows）
+# ────────────────────────────────────────────────────────────────────────────────
+def _co_initialize():
+    # 调度器工作线程初始化：Shell 接口需要 COM
+    import pythoncom
+    pythoncom.CoInitialize()
+
+
+class DesktopExecutor(ActionExecutor):
+    def open_url(self, url: str):
+        webbrowser.open(url)
+
+    def open_target(self, target):
+        if isinstance(target, dict):
+            if "url" in target:
+                webbrowser.open(target["url"])
+            elif "folder" in target:
+                os.startfile(target["folder"])
+            else:
+                os.startfile(target["file"])
+        else:
+            ctypes.windll.shell32.ShellExecuteW(None, "runas", target, None, None, 1)
+
+    def press(self, *keys: str):
+        import pyautogui
+        if len(keys) == 1:
+            pyautogui.press(keys[0])
+        else:
+            pyautogui.hotkey(*keys)
+
+    def terminate(self, pid: int) -> str:
+        import psutil
+        try:
+            p = psutil.Process(pid)
+            name = p.name()
+            p.terminate()
+            return f"关闭 {name}"
+        except psutil.NoSuchProcess:
+            return "未找到前台程序"
+        except Exception as e:
+            return f"关闭失败: {e}"
+
 
 # ────────────────────────────────────────────────────────────────────────────────
 # 主窗口（含托盘 & 热键）
@@ -218,6 +703,12 @@ class VoiceAssistant(QtWidgets.QMainWindow):
     sig_stop = QtCore.pyqtSignal()
     sig_show = QtCore.pyqtSignal()
     sig_exit = QtCore.pyqtSignal()
+    sig_speak = QtCore.pyqtSignal(str)    # 工作线程 → 输出框
+    sig_trace = QtCore.pyqtSignal()       # 有新的延迟追踪完成
+    sig_export = QtCore.pyqtSignal()
+    sig_ready = QtCore.pyqtSignal()       # 后台启动完成
+    sig_wake = QtCore.pyqtSignal()        # 进入唤醒词模式
+    sig_call = QtCore.pyqtSignal(object)  # (fn, Future)：在 GUI 线程执行（控制接口）
 
     def __init__(self):
         super().__init__()
@@ -228,30 +719,221 @@ class VoiceAssistant(QtWidgets.QMainWindow):
 
         # 状态变量
         self.listening = False
+        self.wake_mode = False                # 监听中且为唤醒词模式
         self.speech_thread: SpeechThread | None = None
+        self.once_task: SpeechOnceTask | None = None
+        self.startup: dict[str, float] = {"imports": (_T_IMPORTS - _T0) * 1e3}   # 各阶段毫秒
+        # 常驻音频会话（后台启动）：输入流与噪声校准在多次开始/停止之间保持
+        self.audio: "AudioSession | None" = None
+        self.tracer = Tracer()
         self.custom_cmds = self.load_cmds()
 
+        # 指令执行放到线程池，GUI 线程不被启动器/按键模拟阻塞
+        self.dispatcher = ActionDispatcher(self.sig_speak.emit, initializer=_co_initialize)
+        # 意图分类与匹配（无界面核心），动作由桌面执行器完成
+        self.usage = UsageStats(USAGE_FILE)
+        self.core = CommandCore(self.custom_cmds, DesktopExecutor(), self.dispatcher,
+                                speak=self.speak, choose=self.ask_select, tracer=self.tracer,
+                                usage=self.usage, lazy_index=True)     # 指令表在后台加载
+        self.matcher = self.core.matcher
+
         # 热键配置
         self.settings = QtCore.QSettings("VACompany", "VoiceAssistant")
         self.current_hotkey = self.settings.value("hotkey", "F8")
+        self.wake_phrase = self.settings.value("wake_phrase", "你好助手")
+        self.pre_roll_ms = int(self.settings.value("pre_roll_ms", 300))   # 语音段开头的预录音
+        self.control_port = int(self.settings.value("control_port", 0))   # 0 = 不开启控制接口
+        self.control_token = self.settings.value("control_token", "")
+        extra = self.settings.value("extra_browsers", "")   # 内置列表之外的浏览器进程名
+        if isinstance(extra, str):                          # 逗号分隔的值 QSettings 可能已拆成列表
+            extra = extra.split(",")
+        self.extra_browsers = [b.strip() for b in extra if b.strip()]
+        if self.control_port and not self.control_token:
+            import secrets
+            self.control_token = secrets.token_urlsafe(24)
+            self.settings.setValue("control_token", self.control_token)
+        self.control: "ControlServer | None" = None
 
         # UI
         self.init_ui()
 
-        # 托盘
+        # 识别后端（后台创建）
+        self.engine = self.settings.value("engine", "google")
+        self.model_path = self.settings.value("model_path", "")
+        self.backend: "RecognizerBackend | None" = None
+        self.cached_backend = None          # 实时监听用；单次口述不走缓存
+
+        # 托盘（后台启动）
         self.tray = SystemTray(self)
-        self.tray.start()
 
         # 信号槽
         self.sig_start.connect(self.start_listen)
         self.sig_stop.connect(self.stop_listen)
+        self.sig_wake.connect(self.start_wake)
         self.sig_show.connect(self.show_window)
         self.sig_exit.connect(self.force_exit)
+        self.sig_speak.connect(self.speak)
+        self.sig_trace.connect(self.update_latency_label)
+        self.sig_export.connect(self.export_traces)
+        self.sig_ready.connect(self.on_ready)
+        self.sig_call.connect(self.run_call)
+        self.tracer.on_finish = self.sig_trace.emit
+
+        # 事件循环开始（窗口已显示）后再启动其余子系统
+        self.state_label.setText("状态：启动中…")
+        self.btn_start.setEnabled(False)
+        self.btn_wake.setEnabled(False)
+        self.btn_speech.setEnabled(False)
+        self.btn_settings.setEnabled(False)   # 指令表加载完成前不能编辑
+        QtCore.QTimer.singleShot(0, self.start_background)
+
+    # —— 启动 ────────────────────────────────────────────────────────────────
+    def start_background(self):
+        self.startup["window"] = (time.perf_counter() - _T0) * 1e3
+        threading.Thread(target=self.start_subsystems, daemon=True).start()
+
+    def start_subsystems(self):
+        """后台线程：指令表、热键、托盘、麦克风、识别引擎，完成后发 sig_ready"""
+        from audio import AudioSession
+        from recognition_cache import CachedBackend
+
+        def step(name, fn):
+            t0 = time.perf_counter()
+            try:
+                fn()
+            except Exception as e:
+                self.sig_speak.emit(f"⚠️ 启动{name}失败: {e}")
+            self.startup[name] = (time.perf_counter() - t0) * 1e3
+
+        def start_audio():
+            self.audio = AudioSession(pre_roll_ms=self.pre_roll_ms)
+            self.audio.start()
+            # 等输入流打开，无麦克风 / 设备被占用在启动时就报出来
+            if self.audio.wait_ready(3.0) and self.audio.error:
+                raise self.audio.error
+
+        def start_foreground():
+            from foreground import ForegroundService, Win32Provider
+            service = ForegroundService(Win32Provider(), browsers=self.extra_browsers)
+            service.start()
+            self.core.foreground = service
+
+        def start_backend():
+            backend = self.load_backend()
+            self.cached_backend = CachedBackend(backend)
+            self.backend = backend
+
+        if HAS_PINYIN:
+            step("pinyin", lambda: to_syllables("预热"))  # 预先加载拼音词典
+        # 读取指令表、建索引并预先完成首次查询才做的计算，须先于热键 / 识别
+        step("commands", self.core.build_index)
+        step("hotkey", self.init_hotkey)
+        step("tray", self.tray.start)
+        step("audio", start_audio)
+        step("backend", start_backend)
+        step("foreground", start_foreground)
+        step("control", self.start_control)
+        self.startup["ready"] = (time.perf_counter() - _T0) * 1e3
+        self.sig_ready.emit()
+
+    def on_ready(self):
+        st = self.startup
+        self.state_label.setText("状态：空闲")
+        self.btn_start.setEnabled(self.backend is not None)
+        self.btn_wake.setEnabled(self.backend is not None)
+        self.btn_speech.setEnabled(self.backend is not None)
+        self.btn_settings.setEnabled(True)
+        self.tray.update_menu()
+        self.speak("语音助手已启动（按下 {} 开始监听）".format(self.current_hotkey))
+        self.speak(
+            f"启动耗时：窗口 {st['window']:.0f} ms，就绪 {st['ready']:.0f} ms"
+            f"（导入 {st['imports']:.0f} / 指令表 {st['commands']:.0f} / 热键 {st['hotkey']:.0f} / 托盘 {st['tray']:.0f}"
+            f" / 麦克风 {st['audio']:.0f} / 识别引擎 {st['backend']:.0f}"
+            f" / 前台窗口 {st['foreground']:.0f} / 拼音 {st.get('pinyin', 0):.0f}"
+            f" / 控制接口 {st['control']:.0f}）"
+        )
+        report = {"time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                  **{k: round(v, 1) for k, v in st.items()}}
+        try:
+            with open(STARTUP_LOG, "a", encoding="utf-8") as f:
+                f.write(json.dumps(report) + "\n")
+        except OSError:
+            pass
+        if "--startup-report" in sys.argv:
+            print(json.dumps(report))
+            self.force_exit()
+
+    # —— 本地控制接口 ──────────────────────────────────────────────────────
+    def start_control(self):
+        from control import ControlServer, core_handlers
+        if not self.control_port:
+            return
+        handlers = core_handlers(self.core, self.tracer)
+        handle = handlers["handle"]
+
+        def remote_handle(req):
+            self.speak(f"🔌 {req.get('text', '')}")
+            return handle(req)
+
+        def start(req):
+            self.start_listen_core(wake=req.get("mode") == "wake")
+            return status(req)
+
+        def stop(req):
+            self.stop_listen_core()
+            return status(req)
+
+        def status(req):
+            return {"ready": self.backend is not None, "listening": self.listening,
+                    "wake_mode": self.wake_mode, "engine": self.engine,
+                    "hotkey": self.current_hotkey}
+
+        metrics = handlers["metrics"]
+
+        def remote_metrics(req):
+            out = metrics(req)
+            out["pipeline"] = self.speech_thread.stats() if self.speech_thread else {}
+            if self.cached_backend is not None:
+                out["cache"] = self.cached_backend.cache.stats()
+            out["startup_ms"] = {k: round(v, 1) for k, v in self.startup.items()}
+            return out
+
+        handlers.update(handle=remote_handle, start=start, stop=stop, status=status,
+                        metrics=remote_metrics)
+        server = ControlServer(handlers, self.call_in_gui, port=self.control_port,
+                               token=self.control_token, on_change=self.save_cmds)
+        server.start()
+        self.control = server
+
+    def call_in_gui(self, fn) -> Future:
+        """任意线程 → 在 GUI 线程执行 fn()，结果放进返回的 Future"""
+        fut = Future()
+        self.sig_call.emit((fn, fut))
+        return fut
+
+    def run_call(self, job):
+        fn, fut = job
+        if not fut.set_running_or_notify_cancel():
+            return
+        try:
+            fut.set_result(fn())
+        except BaseException as e:
+            fut.set_exception(e)
 
-        # 全局热键
+    def init_hotkey(self):
+        import keyboard
         keyboard.add_hotkey(self.current_hotkey, lambda: self.hotkey_toggle())
 
-        self.speak("语音助手已启动（按下 {} 开始监听）".format(self.current_hotkey))
+    # —— 识别后端 ────────────────────────────────────────────────────────────
+    def load_backend(self) -> "RecognizerBackend":
+        import speech_recognition as sr
+        from recognizers import create_backend
+        try:
+            return create_backend(self.engine, self.model_path)
+        except sr.RequestError as e:
+            self.engine = "google"
+            self.sig_speak.emit(f"⚠️ {e}，改用 Google 在线识别")
+            return create_backend(self.engine)
 
     # —— UI ────────────────────────────────────────────────────────────────────
     def init_ui(self):
@@ -274,14 +956,17 @@ class VoiceAssistant(QtWidgets.QMainWindow):
         btn_box = QtWidgets.QHBoxLayout()
         self.btn_start = QtWidgets.QPushButton("🎧 开始监听")
         self.btn_start.clicked.connect(self.start_listen)
+        self.btn_wake = QtWidgets.QPushButton("👂 唤醒词模式")
+        self.btn_wake.clicked.connect(self.start_wake)
         self.btn_stop = QtWidgets.QPushButton("⏹️ 停止监听")
         self.btn_stop.clicked.connect(self.stop_listen)
         self.btn_stop.setEnabled(False)
-        btn_speech = QtWidgets.QPushButton("🎤 语音转文字")
+        self.btn_speech = btn_speech = QtWidgets.QPushButton("🎤 语音转文字")
         btn_speech.clicked.connect(self.speech_once)
-        btn_settings = QtWidgets.QPushButton("⚙️ 设置 / 指令管理")
+        self.btn_settings = btn_settings = QtWidgets.QPushButton("⚙️ 设置 / 指令管理")
         btn_settings.clicked.connect(self.open_settings)
         btn_box.addWidget(self.btn_start)
+        btn_box.addWidget(self.btn_wake)
         btn_box.addWidget(self.btn_stop)
         btn_box.addWidget(btn_speech)
         btn_box.addWidget(btn_settings)
@@ -293,29 +978,34 @@ class VoiceAssistant(QtWidgets.QMainWindow):
         self.result_box.setReadOnly(True)
         vbox.addWidget(self.result_box, stretch=1)
 
+        # 延迟统计（p50 / p95）
+        self.latency_label = QtWidgets.QLabel("延迟：暂无数据")
+        self.latency_label.setStyleSheet("color: gray")
+        vbox.addWidget(self.latency_label)
+
     # —— 说话输出 ────────────────────────────────────────────────────────────
     def speak(self, text: str):
         self.result_box.append(text)
         self.result_box.moveCursor(QtGui.QTextCursor.End)
 
     # —— 配置读写 ────────────────────────────────────────────────────────────
-    def load_cmds(self):
-        if os.path.exists(CONFIG_FILE):
-            with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        return {}
+    def load_cmds(self) -> CommandStore:
+        # 快照 + 追加日志；旧版 command_map.json 直接作为快照读入
+        return CommandStore(CONFIG_FILE)
 
     def save_cmds(self):
-        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-            json.dump(self.custom_cmds, f, ensure_ascii=False, indent=2)
+        # 改动已逐条追加到日志，这里只需落盘（必要时压缩）
+        self.custom_cmds.flush()
 
     # —— Settings ────────────────────────────────────────────────────────────
     def open_settings(self):
-        dlg = SettingsDialog(self.custom_cmds, self.current_hotkey, self.save_cmds, self)
+        dlg = SettingsDialog(self.custom_cmds, self.current_hotkey, self.save_cmds,
+                             self.matcher, self.engine, self.model_path, self.wake_phrase, self)
         if dlg.exec_() == QtWidgets.QDialog.Accepted:
             # 新热键
             new_hotkey = dlg.get_hotkey()
             if new_hotkey and new_hotkey != self.current_hotkey:
+                import keyboard
                 try:
                     keyboard.remove_hotkey(self.current_hotkey)
                 except Exception:
@@ -325,6 +1015,28 @@ class VoiceAssistant(QtWidgets.QMainWindow):
                 self.settings.setValue("hotkey", new_hotkey)
                 self.settings.sync()
                 self.speak(f"已将热键改为 {new_hotkey}")
+            # 识别引擎（下次开始监听时生效）
+            engine, model_path = dlg.get_engine()
+            if (engine, model_path) != (self.engine, self.model_path):
+                self.engine, self.model_path = engine, model_path
+                from recognition_cache import CachedBackend
+                from recognizers import BACKENDS
+                self.backend = self.load_backend()
+                self.cached_backend = CachedBackend(self.backend)
+                self.settings.setValue("engine", self.engine)
+                self.settings.setValue("model_path", self.model_path)
+                self.settings.sync()
+                self.speak(f"识别引擎：{BACKENDS[self.engine]}")
+            # 唤醒词
+            wake_phrase = dlg.get_wake_phrase()
+            if wake_phrase and wake_phrase != self.wake_phrase:
+                self.wake_phrase = wake_phrase
+                self.settings.setValue("wake_phrase", wake_phrase)
+                self.settings.sync()
+                self.speak(f"唤醒词：{wake_phrase}")
+                if self.wake_mode:          # 用新唤醒词重新开始
+                    self.stop_listen_core()
+                    self.start_listen_core(wake=True)
             self.tray.update_menu()  # 指令变动也可能影响菜单
     # —— 热键切换（启动 ⇄ 停止） ——————————————————————————
     def hotkey_toggle(self):
@@ -340,27 +1052,52 @@ class VoiceAssistant(QtWidgets.QMainWindow):
     def stop_listen(self):
         self.sig_stop.emit()
 
-    def start_listen_core(self):
-        if self.listening:
+    def start_wake(self):
+        self.start_listen_core(wake=True)
+
+    def start_listen_core(self, wake: bool = False):
+        """wake=True：唤醒词模式，只有唤醒词之后的一句才送识别"""
+        if self.backend is None:                      # 尚未启动完成
             return
-        self.listening = True
-        self.state_label.setText("状态：监听中…")
-        self.btn_start.setEnabled(False)
-        self.btn_stop.setEnabled(True)
+        if self.listening:
+            if self.wake_mode == wake:
+                return
+            self.stop_listen_core()                   # 两种监听模式之间切换
+        phrases = None
+        if wake:
+            from wakeword import parse_phrases
+            phrases = parse_phrases(self.wake_phrase)
+            if not self.model_path:
+                self.speak("⚠️ 唤醒词模式需要在设置中指定 Vosk 离线模型目录")
+                return
+        self.listening, self.wake_mode = True, wake
+        self.state_label.setText("状态：等待唤醒词…" if wake else "状态：监听中…")
+        self.update_listen_buttons()
 
         # 后台线程
-        self.speech_thread = SpeechThread()
+        self.speech_thread = SpeechThread(self.cached_backend, self.audio, self.tracer,
+                                          phrases, self.model_path)
         self.speech_thread.recognized.connect(self.on_recognized)
+        self.speech_thread.partial.connect(self.input_line.setText)
         self.speech_thread.status_msg.connect(self.state_label.setText)
+        self.speech_thread.failed.connect(self.on_listen_failed)
         self.speech_thread.start()
         self.tray.update_menu()
 
+    def on_listen_failed(self, msg: str):
+        self.speak(msg)
+        self.stop_listen_core()
+
+    def update_listen_buttons(self):
+        self.btn_start.setEnabled(not self.listening or self.wake_mode)
+        self.btn_wake.setEnabled(not self.wake_mode)
+        self.btn_stop.setEnabled(self.listening)
+
     def stop_listen_core(self):
         if not self.listening:
             return
-        self.listening = False
-        self.btn_start.setEnabled(True)
-        self.btn_stop.setEnabled(False)
+        self.listening = self.wake_mode = False
+        self.update_listen_buttons()
         self.state_label.setText("状态：空闲")
         if self.speech_thread:
             self.speech_thread.stop()
@@ -377,32 +1114,69 @@ class VoiceAssistant(QtWidgets.QMainWindow):
 
     # —— 单次语音转文字 ────────────────────────────────────────────────────
     def speech_once(self):
-        rec = sr.Recognizer()
-        with sr.Microphone() as src:
-            self.state_label.setText("开始说话…")
-            rec.adjust_for_ambient_noise(src)
-            try:
-                audio = rec.listen(src, timeout=5, phrase_time_limit=5)
-                text = rec.recognize_google(audio, language="zh-CN")
-                self.state_label.setText("识别完成")
-                self.speak(f"📝 {text}")
-                self.input_line.setText(text)
-                self.handle_cmd(text)
-            except sr.WaitTimeoutError:
-                self.speak("⏰ 未检测到语音")
-            except sr.UnknownValueError:
-                self.speak("❓ 无法识别")
-            except sr.RequestError:
-                self.speak("⚠️ 服务出错")
-            finally:
-                self.state_label.setText("状态：空闲")
+        # 进行中再次点击 = 取消
+        if self.once_task:
+            self.once_task.cancel()
+            return
+        if self.backend is None:
+            return
+        task = self.once_task = SpeechOnceTask(self.backend, self.audio)
+        task.signals.status.connect(self.state_label.setText)
+        task.signals.done.connect(self.on_speech_once)
+        task.signals.failed.connect(self.speak)
+        task.signals.finished.connect(self.on_speech_once_finished)
+        self.btn_speech.setText("✖️ 取消识别")
+        QtCore.QThreadPool.globalInstance().start(task)
+
+    def on_speech_once(self, text: str):
+        self.state_label.setText("识别完成")
+        self.speak(f"📝 {text}")
+        self.input_line.setText(text)
+        self.handle_cmd(text)
+
+    def on_speech_once_finished(self):
+        self.once_task = None
+        self.btn_speech.setText("🎤 语音转文字")
+        if not self.listening:
+            self.state_label.setText("状态：空闲")
+        else:
+            self.state_label.setText("状态：等待唤醒词…" if self.wake_mode else "状态：监听中…")
 
     # —— 识别回调 ───────────────────────────────────────────────────────────
-    @QtCore.pyqtSlot(str)
-    def on_recognized(self, txt):
+    def on_recognized(self, txt: str, trace: Trace | None = None):
+        if trace is not None:
+            trace.mark("deliver")
+            trace.meta["text"] = txt
         self.input_line.setText(txt)
         self.speak(f"📝 {txt}")
-        self.handle_cmd(txt)
+        self.handle_cmd(txt, trace)
+        self.update_stats_tip()
+
+    # —— 延迟追踪 ───────────────────────────────────────────────────────────
+    def update_latency_label(self):
+        self.latency_label.setText(f"延迟：{self.tracer.summary()}")
+
+    def export_traces(self):
+        try:
+            self.tracer.export_chrome(TRACE_FILE + ".json")
+            self.tracer.export_jsonl(TRACE_FILE + ".jsonl")
+            self.speak(f"已导出延迟追踪：{TRACE_FILE}.json / .jsonl")
+        except OSError as e:
+            self.speak(f"⚠️ 导出失败: {e}")
+
+    def update_stats_tip(self):
+        st = self.speech_thread.stats() if self.speech_thread else {}
+        if not st:
+            return
+        lat = st["latency"]
+        cache = self.cached_backend.cache.stats()
+        self.state_label.setToolTip(
+            f"队列 {st['depth']}/{st['max_depth']}  丢弃 {st['dropped']}\n"
+            f"缓存 {cache['size']} 条  命中率 {cache['hit_rate']:.0%}\n" + "\n".join(
+                f"{k}: 平均 {v['avg_ms']:.0f} ms / 最大 {v['max_ms']:.0f} ms"
+                for k, v in lat.items()
+            )
+        )
 
     # —— 托盘 & 窗口控制 ────────────────────────────────────────────────────
     def show_window(self):
@@ -411,6 +1185,18 @@ class VoiceAssistant(QtWidgets.QMainWindow):
         self.activateWindow()
 
     def force_exit(self):
+        if self.once_task:
+            self.once_task.cancel()
+        self.stop_listen_core()
+        if self.audio:
+            self.audio.close()
+        self.dispatcher.shutdown()
+        if self.core.foreground:
+            self.core.foreground.stop()
+        if self.control:
+            self.control.stop()
+        self.custom_cmds.close()
+        self.usage.close()
         self.tray.stop()
         QtWidgets.QApplication.quit()
 
@@ -429,99 +1215,8 @@ class VoiceAssistant(QtWidgets.QMainWindow):
         )
         return item if ok else None
 
-    def handle_cmd(self, cmd: str):
-        lower = cmd.lower()
-
-        # —— 关键字逻辑指令 ----------------------------------------------------
-        if lower.startswith("搜索"):
-            q = cmd[2:].strip()
-            if q:
-                self.speak(f"🔍 AI 搜索: {q}")
-                webbrowser.open(f"https://www.perplexity.ai/search?q={q}")
-            else:
-                self.speak("请给出搜索内容")
-            return
-
-        if lower.startswith(("谷歌搜索", "查找")):
-            q = cmd.replace("谷歌搜索", "").replace("查找", "").strip()
-            if q:
-                self.speak(f"🔍 Google: {q}")
-                webbrowser.open(f"https://www.google.com/search?q={q}")
-            else:
-                self.speak("请给出搜索内容")
-            return
-
-        if "关闭当前程序" in lower or "关闭程序" in lower:
-            self.close_foreground()
-            return
-
-        browser_map = {
-            ("关闭标签页", "关闭网页"): ("ctrl", "w"),
-            ("新建标签页", "打开新标签页"): ("ctrl", "t"),
-            ("刷新网页", "刷新页面"): ("f5",),
-            ("后退", "返回上一页"): ("alt", "left"),
-            ("前进", "下一页"): ("alt", "right"),
-        }
-        for keys, hot in browser_map.items():
-            if any(k in lower for k in keys):
-                self.browser_action(*hot)
-                self.speak(f"已执行浏览器操作")
-                return
-
-        # —— 自定义关键词匹配 ---------------------------------------------------
-        key = self.find_best_match(lower)
-        if not key:
-            self.speak("❌ 未识别此指令")
-            return
-
-        target = self.custom_cmds[key]
-        try:
-            if isinstance(target, dict):
-                if "url" in target:
-                    self.speak(f"🌐 打开 {key}")
-                    webbrowser.open(target["url"])
-                elif "folder" in target:
-                    self.speak(f"📂 打开文件夹 {key}")
-                    os.startfile(target["folder"])
-                else:
-                    self.speak(f"📄 打开文件 {key}")
-                    os.startfile(target["file"])
-            else:
-                self.speak(f"🚀 运行 {key}")
-                ctypes.windll.shell32.ShellExecuteW(None, "runas", target, None, None, 1)
-        except Exception as e:
-            self.speak(f"⚠️ 执行失败: {e}")
-
-    # —— 工具：最佳匹配 --------------------------------------------------------
-    def find_best_match(self, cmd: str):
-        for k in self.custom_cmds:
-            if k.lower() in cmd:
-                return k
-        matches = difflib.get_close_matches(cmd, self.custom_cmds.keys(), n=3, cutoff=0.4)
-        if matches:
-            return self.ask_select(matches)
-        return None
-
-    # —— 浏览器操作 ------------------------------------------------------------
-    def browser_action(self, *keys):
-        if len(keys) == 1:
-            pyautogui.press(keys[0])
-        else:
-            pyautogui.hotkey(*keys)
-
-    # —— 关闭前台程序 ----------------------------------------------------------
-    def close_foreground(self):
-        try:
-            hwnd = win32gui.GetForegroundWindow()
-            _, pid = win32process.GetWindowThreadProcessId(hwnd)
-            for p in psutil.process_iter(['pid', 'name']):
-                if p.info['pid'] == pid:
-                    self.speak(f"关闭 {p.info['name']}")
-                    p.terminate()
-                    return
-            self.speak("未找到前台程序")
-        except Exception as e:
-            self.speak(f"关闭失败: {e}")
+    def handle_cmd(self, cmd: str, trace: Trace | None = None):
+        self.core.handle(cmd, trace)
 
 
 # ────────────────────────────────────────────────────────────────────────────────
@@ -530,30 +1225,44 @@ class VoiceAssistant(QtWidgets.QMainWindow):
 class SystemTray:
     def __init__(self, win: VoiceAssistant):
         self.win = win
-        img = Image.new("RGB", (64, 64), (0, 128, 0))
-        d = ImageDraw.Draw(img); d.text((15, 20), "VA", fill=(255, 255, 255))
-        self.icon = pystray.Icon("VA", img, "语音助手", menu=self.menu())
+        self.icon = None            # start() 时才导入 pystray / PIL 并创建
 
     def menu(self):
+        from pystray import Menu, MenuItem as TrayItem
+
         def gen_menu():
             yield TrayItem("显示窗口", lambda: self.win.sig_show.emit())
-            if self.win.listening:
-                yield TrayItem("停止监听", lambda: self.win.sig_stop.emit())
-            else:
-                yield TrayItem("开始监听", lambda: self.win.sig_start.emit())
+            # 三种监听状态，单选
+            win = self.win
+            yield TrayItem("开始监听", lambda: win.sig_start.emit(), radio=True,
+                           checked=lambda _: win.listening and not win.wake_mode)
+            yield TrayItem("唤醒词模式", lambda: win.sig_wake.emit(), radio=True,
+                           checked=lambda _: win.wake_mode)
+            yield TrayItem("停止监听", lambda: win.sig_stop.emit(), radio=True,
+                           checked=lambda _: not win.listening)
+            yield TrayItem("导出延迟追踪", lambda: self.win.sig_export.emit())
             yield TrayItem("退出", lambda: self.win.sig_exit.emit())
-        return pystray.Menu(gen_menu)
+        return Menu(gen_menu)
 
     def start(self):
+        import pystray
+        from PIL import Image, ImageDraw
+        img = Image.new("RGB", (64, 64), (0, 128, 0))
+        d = ImageDraw.Draw(img); d.text((15, 20), "VA", fill=(255, 255, 255))
+        self.icon = pystray.Icon("VA", img, "语音助手", menu=self.menu())
         threading.Thread(target=self.icon.run, daemon=True).start()
 
     def stop(self):
+        if self.icon is None:
+            return
         try:
             self.icon.stop()
         except Exception:
             pass
 
     def update_menu(self):
+        if self.icon is None:
+            return
         try:
             self.icon.update_menu()
         except Exception:
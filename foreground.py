@@ -0,0 +1,135 @@
+"""
+前台窗口服务
+============
+后台线程跟踪前台窗口及其进程名，指令执行时直接读取：
+• 轮询 GetForegroundWindow（每次只是一个系统调用，默认 100 ms），窗口变化时才查一次进程信息
+• `current()` 只读缓存，O(1)，可在任意线程调用
+• 关闭程序、浏览器按键前可先确认目标（如前台是浏览器才发送 ctrl+w）；
+  内置列表之外的浏览器由 `browsers` 补充，进程名取不到的窗口不拦
+• 数据来源由 provider 提供：`Win32Provider` 用 pywin32 + psutil，`FakeProvider` 供 Linux 上测试
+"""
+
+import threading
+from typing import NamedTuple
+
+BROWSERS = {
+    "chrome.exe", "msedge.exe", "firefox.exe", "brave.exe", "opera.exe", "vivaldi.exe",
+    "iexplore.exe", "360se.exe", "360chrome.exe", "qqbrowser.exe", "sogouexplorer.exe",
+}
+
+
+class ProcessInfo(NamedTuple):
+    pid: int
+    name: str
+
+
+class WindowInfo(NamedTuple):
+    hwnd: int
+    pid: int
+    title: str
+    name: str               # 进程名（如 chrome.exe），未知时为 ""
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 数据来源
+# ────────────────────────────────────────────────────────────────────────────────
+class ForegroundProvider:
+    def foreground(self) -> tuple[int, int, str] | None:
+        """(hwnd, pid, 标题)；没有前台窗口时 None"""
+        raise NotImplementedError
+
+    def process(self, pid: int) -> ProcessInfo | None:
+        raise NotImplementedError
+
+
+class Win32Provider(ForegroundProvider):
+    def __init__(self):
+        import psutil, win32gui, win32process
+        self._psutil, self._gui, self._proc = psutil, win32gui, win32process
+
+    def foreground(self):
+        hwnd = self._gui.GetForegroundWindow()
+        if not hwnd:
+            return None
+        pid = self._proc.GetWindowThreadProcessId(hwnd)[1]
+        return hwnd, pid, self._gui.GetWindowText(hwnd)
+
+    def process(self, pid):
+        try:
+            return ProcessInfo(pid, self._psutil.Process(pid).name())
+        except self._psutil.Error:
+            return None
+
+
+class FakeProvider(ForegroundProvider):
+    """测试用：手动设置前台窗口与进程表"""
+
+    def __init__(self, procs: dict[int, str] | None = None):
+        self.procs = dict(procs or {})
+        self.window: tuple[int, int, str] | None = None
+        self.lookups = 0                        # process() 被调用的次数
+
+    def focus(self, pid: int, title: str = "", hwnd: int | None = None):
+        self.window = (hwnd if hwnd is not None else pid, pid, title)
+
+    def foreground(self):
+        return self.window
+
+    def process(self, pid):
+        self.lookups += 1
+        name = self.procs.get(pid)
+        return ProcessInfo(pid, name) if name is not None else None
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 服务
+# ────────────────────────────────────────────────────────────────────────────────
+class ForegroundService:
+    def __init__(self, provider: ForegroundProvider, interval: float = 0.1, browsers=()):
+        """browsers: 内置 BROWSERS 之外也当作浏览器的进程名（如 "arc.exe"）"""
+        self.provider = provider
+        self.interval = interval
+        self.browsers = BROWSERS | {b.lower() for b in browsers}
+        self._window: tuple | None = None        # provider 上次返回的原始值
+        self._current: WindowInfo | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        self.poll()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="foreground")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:               # 锁屏等情况下偶发失败，下次再试
+                pass
+
+    def poll(self):
+        """取一次前台窗口；窗口变化时刷新其进程信息"""
+        win = self.provider.foreground()
+        prev, self._window = self._window, win
+        if win == prev:
+            return
+        if win is None:
+            self._current = None
+            return
+        hwnd, pid, title = win
+        if prev is not None and prev[:2] == win[:2] and self._current is not None:
+            self._current = self._current._replace(title=title)   # 同一窗口只是标题变了
+            return
+        info = self.provider.process(pid)      # pid 可能被复用，切换窗口时重新取一次
+        self._current = WindowInfo(hwnd, pid, title, info.name if info else "")
+
+    # —— 查询（任意线程） ─────────────────────────────────────────────────────
+    def current(self) -> WindowInfo | None:
+        return self._current
+
+    def is_browser(self, info: WindowInfo | None) -> bool:
+        """前台进程是已知的浏览器；进程名未知（取进程信息失败）时不能断定不是，按是处理"""
+        return info is not None and (not info.name or info.name.lower() in self.browsers)
@@ -0,0 +1,133 @@
+"""
+内置意图语法
+============
+把 `handle_cmd` 里原先一串 startswith / `any(k in lower ...)` 的判断改成声明式的意图表，
+启动时编译进 `CommandMatcher` 的同一个 Aho-Corasick 自动机，与自定义关键词合并：
+一次扫描识别文本，同时得到命中的内置意图和自定义关键词。
+
+意图类型：
+• PREFIX   ：文本以某个触发词开头，其后的内容作为槽位（如搜索词）
+• CONTAINS ：文本中包含某个触发词
+
+优先级与原先的判断顺序一致：内置意图按表中顺序，均未命中时才看自定义关键词
+（自定义关键词之间按添加顺序）。
+
+多条指令：`split()` 按连接词（然后、再、和、逗号……）把一句话切成几条，
+只在切出的每一段都能单独识别为意图时才切，“打开和平精英”这类含连接词的名字不受影响。
+PREFIX 意图的槽位取到句末，其后不再切（“搜索微信和QQ的区别”整句是搜索词）；
+第二段起须以动词 / 触发词开头或恰好是一个关键词（“打开微信和QQ”），
+避免把搜索词、名字里的片段当成指令。
+"""
+
+import re
+from typing import NamedTuple
+
+from matcher import CommandMatcher
+
+PREFIX = "prefix"
+CONTAINS = "contains"
+
+
+class Intent(NamedTuple):
+    name: str               # 对应 VoiceAssistant.do_<name>
+    kind: str               # PREFIX / CONTAINS
+    patterns: tuple         # 触发词
+    args: tuple = ()        # 传给处理函数的固定参数
+
+
+INTENTS = (
+    Intent("search", PREFIX, ("搜索",), ("🔍 AI 搜索", "https://www.perplexity.ai/search?q={}")),
+    Intent("search", PREFIX, ("谷歌搜索", "查找"), ("🔍 Google", "https://www.google.com/search?q={}")),
+    Intent("close_app", CONTAINS, ("关闭当前程序", "关闭程序")),
+    Intent("browser", CONTAINS, ("关闭标签页", "关闭网页"), ("ctrl", "w")),
+    Intent("browser", CONTAINS, ("新建标签页", "打开新标签页"), ("ctrl", "t")),
+    Intent("browser", CONTAINS, ("刷新网页", "刷新页面"), ("f5",)),
+    Intent("browser", CONTAINS, ("后退", "返回上一页"), ("alt", "left")),
+    Intent("browser", CONTAINS, ("前进", "下一页"), ("alt", "right")),
+)
+
+# 自定义关键词命中时返回的意图，槽位为 custom_cmds 的 key
+CUSTOM = Intent("open", CONTAINS, ())
+
+
+# 连接词 / 标点：可能的切分点
+_SEPARATORS = re.compile(r"然后|接着|之后|并且|同时|还有|以及|再|和|跟|[,，;；、。]")
+_MAX_PIECES = 12            # 切分点过多时不再尝试（动态规划为平方复杂度）
+# 第二段起可以作为一条新指令开头的词（内置意图的触发词另外加入）
+_LEADS = ("打开", "启动", "运行", "开启", "关闭", "关掉", "帮我", "给我")
+
+
+class _Rule(NamedTuple):
+    priority: int
+    intent: Intent
+    length: int             # 触发词长度（用于 PREFIX 判断起点与切出槽位）
+
+
+class IntentGrammar:
+    def __init__(self, matcher: CommandMatcher, intents=INTENTS):
+        self.matcher = matcher
+        self.intents = tuple(intents)
+        for prio, intent in enumerate(self.intents):
+            for p in intent.patterns:
+                matcher.add_rule(p.lower(), _Rule(prio, intent, len(p)))
+        self._leads = _LEADS + tuple(p.lower() for i in self.intents for p in i.patterns)
+
+    def classify(self, cmd: str) -> tuple[Intent | None, str]:
+        """返回 (意图, 槽位)；自定义关键词命中时为 (CUSTOM, key)，都未命中为 (None, "")"""
+        lower = cmd.lower()
+        best_rule, best_slot = None, ""
+        best_key, best_seq = None, None
+        seq = self.matcher.seq
+        for end, hits in self.matcher.scan(lower):
+            for h in hits:
+                if h.__class__ is _Rule:
+                    if best_rule is not None and h.priority >= best_rule.priority:
+                        continue
+                    if h.intent.kind == PREFIX:
+                        if end + 1 != h.length:
+                            continue
+                        best_rule, best_slot = h, cmd[end + 1:].strip()
+                    else:
+                        best_rule, best_slot = h, ""
+                elif best_rule is None:
+                    s = seq(h)
+                    if best_seq is None or s < best_seq:
+                        best_key, best_seq = h, s
+        if best_rule is not None:
+            return best_rule.intent, best_slot
+        if best_key is not None:
+            return CUSTOM, best_key
+        return None, ""
+
+    def split(self, cmd: str) -> list[str]:
+        """
+        把一句话切成多条指令；每一段都必须能被 classify 识别，否则不切（返回 [cmd]）。
+        PREFIX 意图只能是最后一段，第二段起须像一条新指令的开头。有多种切法时取段数最多的。
+        """
+        # 连接词之间的非空片段 [(起, 止)]
+        pieces, pos = [], 0
+        for m in _SEPARATORS.finditer(cmd):
+            if cmd[pos:m.start()].strip():
+                pieces.append((pos, m.start()))
+            pos = m.end()
+        if cmd[pos:].strip():
+            pieces.append((pos, len(cmd)))
+        if len(pieces) < 2 or len(pieces) > _MAX_PIECES:
+            return [cmd]
+
+        # best[i]：前 i 个片段的最多段数切法（每段由相邻片段连同中间的连接词拼成）
+        n = len(pieces)
+        best: list[list[str] | None] = [[]] + [None] * n
+        for i in range(1, n + 1):
+            for j in range(i):
+                if best[j] is None:
+                    continue
+                part = cmd[pieces[j][0]:pieces[i - 1][1]].strip()
+                if j and not (part.lower().startswith(self._leads) or part in self.matcher):
+                    continue
+                intent = self.classify(part)[0]
+                if intent is None or intent.kind == PREFIX and i < n:
+                    continue
+                if best[i] is None or len(best[j]) + 1 > len(best[i]):
+                    best[i] = best[j] + [part]
+        return best[n] if best[n] and len(best[n]) > 1 else [cmd]
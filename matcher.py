@@ -0,0 +1,456 @@
+"""
+指令匹配索引
+============
+为 `custom_cmds` 的关键词维护一份可增量更新的索引，替代逐个 key 的线性扫描：
+• 子串命中：Aho-Corasick 自动机，一次扫描识别文本即可找出所有被包含的关键词
+• 模糊候选：字符倒排索引 + quick_ratio 上界剪枝，仅对少量候选跑 difflib
+• 同音匹配：预先计算每个 key 的无声调拼音，按相邻音节对倒排索引，
+  用有界编辑距离处理识别出的同音/近音字（如“微心”→“微信”）；需要 pypinyin
+
+返回结果与原先的 `k.lower() in cmd` / `difflib.get_close_matches` 完全一致
+（子串命中取插入顺序最靠前的 key；模糊候选按 ratio 排序取前 n 个）。
+"""
+
+from collections import Counter, deque
+from difflib import SequenceMatcher
+from heapq import nlargest
+from importlib.util import find_spec
+
+# pypinyin 导入时要加载整份拼音词典（数百毫秒），推迟到首次计算拼音；未安装时同音匹配层自动关闭
+HAS_PINYIN = find_spec("pypinyin") is not None
+_lazy_pinyin = None
+
+
+def _pinyin(text: str) -> list[str]:
+    global _lazy_pinyin
+    if _lazy_pinyin is None:
+        from pypinyin import lazy_pinyin as _lazy_pinyin
+    return _lazy_pinyin(text)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Aho-Corasick 自动机（批量插入后整体建失败指针，之后的增删只修补受影响的结点）
+# ────────────────────────────────────────────────────────────────────────────────
+class _Automaton:
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.goto: list[dict] = [{}]
+        self.fail: list[int] = [0]
+        self.out: list[set] = [set()]
+        self.link: list[int] = [0]    # 输出链：最近的、带输出的后缀结点
+        self.kids: dict[int, set] = {}    # 失败指针的反向边：结点 → 失败指针指向它的结点
+        self.entry: dict[str, list] = {}  # 字符 → 经该字符进入的结点
+        self.dirty = True             # 清空后的批量插入只建 trie，首次扫描时一次建好
+
+    def insert(self, pattern: str, key: str):
+        node = 0
+        for ch in pattern:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append(set())
+                self.link.append(0)
+                self.entry.setdefault(ch, []).append(nxt)
+                if not self.dirty:
+                    self._attach(node, ch, nxt)
+            node = nxt
+        had = bool(self.out[node])
+        self.out[node].add(key)
+        if not had and not self.dirty:
+            self._relink(node, node)
+
+    def discard(self, pattern: str, key: str):
+        node = 0
+        for ch in pattern:
+            node = self.goto[node].get(ch)
+            if node is None:
+                return
+        out = self.out[node]
+        if key not in out:
+            return
+        out.discard(key)
+        if not out and not self.dirty:
+            self._relink(node, self.link[node])
+
+    def build(self):
+        self.kids = {}
+        queue = deque()
+        for nxt in self.goto[0].values():
+            self.fail[nxt] = 0
+            self.link[nxt] = 0
+            self.kids.setdefault(0, set()).add(nxt)
+            queue.append(nxt)
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                f = self.goto[f].get(ch, 0)
+                if f == nxt:
+                    f = 0
+                self.fail[nxt] = f
+                self.link[nxt] = f if self.out[f] else self.link[f]
+                self.kids.setdefault(f, set()).add(nxt)
+                queue.append(nxt)
+        self.dirty = False
+
+    # —— 增量维护 ────────────────────────────────────────────────────────────
+    def _set_fail(self, node: int, f: int):
+        kids = self.kids.get(self.fail[node])
+        if kids is not None:
+            kids.discard(node)
+        self.fail[node] = f
+        self.kids.setdefault(f, set()).add(node)
+
+    def _attach(self, parent: int, ch: str, node: int):
+        """新建结点 node = parent·ch：算出它的失败指针，并把原本更短的失败指针改指向它"""
+        goto, fail = self.goto, self.fail
+        if not parent:
+            # 新的首字符：经 ch 进入、失败指针还在根上的结点，改指 node
+            self._set_fail(node, 0)
+            for u in self.entry[ch]:
+                if u != node and not fail[u]:
+                    self._set_fail(u, node)
+                    self._relink(u, self.link[node], self_too=True)
+            return
+        f = fail[parent]
+        while f and ch not in goto[f]:
+            f = fail[f]
+        f = goto[f].get(ch, 0)
+        self._set_fail(node, f)
+        self.link[node] = f if self.out[f] else self.link[f]
+        # 以 parent 为后缀的结点 w（失败树中 parent 的子树）若有 ch 边，w·ch 最长的后缀结点变成 node；
+        # 更深处的结点以 w·ch 为后缀，不受影响，不再往下找
+        stack = list(self.kids.get(parent, ()))
+        while stack:
+            w = stack.pop()
+            u = goto[w].get(ch)
+            if u is None:
+                stack.extend(self.kids.get(w, ()))
+            elif u != node:
+                self._set_fail(u, node)
+                self._relink(u, node if self.out[node] else self.link[node], self_too=True)
+
+    def _relink(self, node: int, target: int, self_too: bool = False):
+        """node 的输出状态或失败指针变了：把经过它取输出链的结点改指向 target"""
+        out, link = self.out, self.link
+        if self_too:
+            link[node] = target
+            if out[node]:          # node 自己有输出，子树的输出链停在 node，不变
+                return
+        stack = list(self.kids.get(node, ()))
+        while stack:
+            x = stack.pop()
+            link[x] = target
+            if not out[x]:
+                stack.extend(self.kids.get(x, ()))
+
+    def scan(self, text: str):
+        """逐个产出 (结束下标, 对象集合)：text[..结束下标] 处出现的模式所对应的对象"""
+        if self.dirty:
+            self.build()
+        goto, fail, out, link = self.goto, self.fail, self.out, self.link
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            hit = node if out[node] else link[node]
+            while hit:
+                yield i, out[hit]
+                hit = link[hit]
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 拼音同音索引
+# ────────────────────────────────────────────────────────────────────────────────
+# 常见模糊音：平翘舌、前后鼻音
+_FUZZY_INITIALS = (("zh", "z"), ("ch", "c"), ("sh", "s"))
+_FUZZY_FINALS = (("ing", "in"), ("eng", "en"), ("ang", "an"))
+
+
+def _normalize(syl: str) -> str:
+    for a, b in _FUZZY_INITIALS:
+        if syl.startswith(a):
+            syl = b + syl[len(a):]
+            break
+    for a, b in _FUZZY_FINALS:
+        if syl.endswith(a):
+            syl = syl[:-len(a)] + b
+            break
+    return syl
+
+
+def to_syllables(text: str) -> tuple[str, ...]:
+    """文本 → 归一化后的无声调音节序列；非汉字片段按空白切分并转小写"""
+    out = []
+    for part in _pinyin(text):
+        if part.isascii() and not part.isalpha():
+            out.extend(w.lower() for w in part.split())
+        else:
+            out.append(_normalize(part.lower()))
+    return tuple(out)
+
+
+def _max_dist(n: int) -> int:
+    # 2 个音节只接受完全同音；3 个及以上每 3 个音节容忍 1 处差异
+    return n // 3
+
+
+def _pairs(syl: tuple) -> set[tuple]:
+    """
+    key 的索引项：相邻音节对。编辑距离不超过 L//3 时 key 至少有一个相邻音节对原样出现在文本里，
+    只有 3 个音节时例外（中间一个被替换或漏识别），另外以首尾两个音节为一对
+    """
+    pairs = set(zip(syl, syl[1:]))
+    if len(syl) == 3:
+        pairs.add((syl[0], syl[2]))
+    return pairs
+
+
+def _semi_global(key: tuple, text: tuple, bound: int) -> int | None:
+    """key 与 text 任意子串之间的最小音节编辑距离；超过 bound 返回 None"""
+    prev = [0] * (len(text) + 1)
+    for i, ks in enumerate(key, 1):
+        cur = [i] + [0] * len(text)
+        best = i
+        for j, ts in enumerate(text, 1):
+            v = prev[j - 1] + (ks != ts)
+            if prev[j] + 1 < v:
+                v = prev[j] + 1
+            if cur[j - 1] + 1 < v:
+                v = cur[j - 1] + 1
+            cur[j] = v
+            if v < best:
+                best = v
+        if best > bound:
+            return None
+        prev = cur
+    d = min(prev)
+    return d if d <= bound else None
+
+
+class PhoneticIndex:
+    enabled = HAS_PINYIN
+
+    def __init__(self):
+        self._syl: dict[str, tuple] = {}                 # key → 音节序列
+        self._index: dict[tuple, set[str]] = {}          # 音节对 → key（见 _pairs）
+        self._pending: set[str] = set()                  # 待计算拼音的 key（首次查询时统一计算）
+
+    def clear(self):
+        self._syl.clear()
+        self._index.clear()
+        self._pending.clear()
+
+    def add(self, key: str):
+        if self.enabled:
+            self._pending.add(key)
+
+    def remove(self, key: str):
+        self._pending.discard(key)
+        syl = self._syl.pop(key, None)
+        for pair in _pairs(syl or ()):
+            bucket = self._index.get(pair)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._index[pair]
+
+    def _flush(self):
+        for key in self._pending:
+            syl = to_syllables(key)
+            if len(syl) < 2:             # 单音节同音字太多，不参与同音匹配
+                continue
+            self._syl[key] = syl
+            for pair in _pairs(syl):
+                self._index.setdefault(pair, set()).add(key)
+        self._pending.clear()
+
+    def search(self, cmd: str) -> list[tuple[int, int, str]]:
+        """返回 [(距离, -音节数, key)]，按距离升序、长 key 优先"""
+        if not self.enabled:
+            return []
+        if self._pending:
+            self._flush()
+        text = to_syllables(cmd)
+        # 文本的相邻音节对，以及隔一个音节的对（对应 3 音节 key 的首尾）
+        index = self._index
+        found: set[str] = set()
+        for pair in {*zip(text, text[1:]), *zip(text, text[2:])}:
+            bucket = index.get(pair)
+            if bucket:
+                found |= bucket
+        result = []
+        for k in found:
+            syl = self._syl[k]
+            d = _semi_global(syl, text, _max_dist(len(syl)))
+            if d is not None:
+                result.append((d, -len(syl), k))
+        result.sort()
+        return result
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 指令匹配器
+# ────────────────────────────────────────────────────────────────────────────────
+class CommandMatcher:
+    def __init__(self, keys=()):
+        self._seq: dict[str, int] = {}            # key → 插入序号（与 dict 顺序一致）
+        self._next = 0
+        self._ac = _Automaton()
+        self._empty: set[str] = set()             # lower() 为空串的 key：任意文本都命中
+        self._chars: dict[str, dict[str, int]] = {}  # 字符 → {key: 出现次数}
+        self._removed = 0
+        self._phonetic = PhoneticIndex()
+        self._rules: list[tuple[str, object]] = []   # 编译进同一自动机的非 key 规则（意图语法）
+        self.rebuild(keys)
+
+    # —— 维护 ────────────────────────────────────────────────────────────────
+    def rebuild(self, keys):
+        self._seq.clear()
+        self._next = 0
+        self._ac.clear()
+        self._empty.clear()
+        self._chars.clear()
+        self._phonetic.clear()
+        self._removed = 0
+        for pattern, rule in self._rules:
+            self._ac.insert(pattern, rule)
+        for k in keys:
+            self.add(k)
+
+    def add_rule(self, pattern: str, rule):
+        """把一条非字符串的规则对象挂到自动机上，`scan()` 时与 key 一并产出"""
+        self._rules.append((pattern, rule))
+        self._ac.insert(pattern, rule)
+
+    def add(self, key: str):
+        if key in self._seq:       # 覆盖已有 key 不改变其位置
+            return
+        self._seq[key] = self._next
+        self._next += 1
+        pattern = key.lower()
+        if pattern:
+            self._ac.insert(pattern, key)
+        else:
+            self._empty.add(key)
+        for ch, cnt in Counter(key).items():
+            self._chars.setdefault(ch, {})[key] = cnt
+        self._phonetic.add(key)
+
+    def remove(self, key: str):
+        if self._seq.pop(key, None) is None:
+            return
+        pattern = key.lower()
+        if pattern:
+            self._ac.discard(pattern, key)
+        else:
+            self._empty.discard(key)
+        for ch in set(key):
+            bucket = self._chars.get(ch)
+            if bucket is not None:
+                bucket.pop(key, None)
+                if not bucket:
+                    del self._chars[ch]
+        self._phonetic.remove(key)
+        # 删除只清空结点输出；废弃结点过多时整体重建一次
+        self._removed += 1
+        if self._removed > 64 and self._removed > len(self._seq):
+            self.rebuild(sorted(self._seq, key=self._seq.__getitem__))
+
+    def rename(self, old: str, new: str):
+        # 与 `d[new] = d.pop(old)` 一致：新 key 排到末尾
+        self.remove(old)
+        self.add(new)
+
+    def __len__(self):
+        return len(self._seq)
+
+    def __contains__(self, key):
+        return key in self._seq
+
+    # —— 查询 ────────────────────────────────────────────────────────────────
+    def substring_hit(self, cmd: str) -> str | None:
+        """等价于按插入顺序返回第一个满足 `k.lower() in cmd` 的 key"""
+        seq = self._seq
+        best, best_seq = None, None
+        for k in self._empty:
+            if best_seq is None or seq[k] < best_seq:
+                best, best_seq = k, seq[k]
+        for _, hits in self._ac.scan(cmd):
+            for k in hits:
+                if k.__class__ is not str:      # 意图规则
+                    continue
+                s = seq[k]
+                if best_seq is None or s < best_seq:
+                    best, best_seq = k, s
+        return best
+
+    def scan(self, cmd: str):
+        """一次扫描产出 (结束下标, 对象集合)，集合里是 key 与规则对象的混合"""
+        return self._ac.scan(cmd)
+
+    def seq(self, key: str) -> int:
+        return self._seq[key]
+
+    def filter(self, text: str) -> list[str]:
+        """包含 text（不区分大小写）的 key，按插入顺序；用字符倒排索引求交集后再核对"""
+        needle = text.lower()
+        if not needle:
+            return sorted(self._seq, key=self._seq.__getitem__)
+        found = None
+        for ch in set(needle):
+            keys = set(self._chars.get(ch, ()))
+            up = ch.upper()
+            if up != ch:
+                keys.update(self._chars.get(up, ()))
+            found = keys if found is None else found & keys
+            if not found:
+                return []
+        hits = [k for k in found if needle in k.lower()]
+        hits.sort(key=self._seq.__getitem__)
+        return hits
+
+    def candidates(self, cmd: str, cutoff: float = 0.4) -> list[str]:
+        """与 cmd 共享字符、且 quick_ratio 上界不低于 cutoff 的 key"""
+        lw = len(cmd)
+        if not lw:                 # 空串只与空 key 相似（ratio 记为 1）
+            return list(self._empty)
+        common: dict[str, int] = {}
+        for ch, cnt in Counter(cmd).items():
+            for k, kc in self._chars.get(ch, {}).items():
+                common[k] = common.get(k, 0) + (cnt if cnt < kc else kc)
+        return [k for k, m in common.items() if 2.0 * m / (lw + len(k)) >= cutoff]
+
+    def close_matches(self, cmd: str, n: int = 3, cutoff: float = 0.4) -> list[str]:
+        """等价于 `difflib.get_close_matches(cmd, keys, n, cutoff)`"""
+        result = []
+        s = SequenceMatcher()
+        s.set_seq2(cmd)
+        for x in self.candidates(cmd, cutoff):
+            s.set_seq1(x)
+            if s.real_quick_ratio() >= cutoff and \
+               s.quick_ratio() >= cutoff and \
+               s.ratio() >= cutoff:
+                result.append((s.ratio(), x))
+        return [x for _, x in nlargest(n, result)]
+
+    def phonetic(self, cmd: str, n: int = 3) -> tuple[str | None, list[str]]:
+        """
+        一次同音查询，返回 (确定的 key, 候选)：
+        确定的 key 只在完全同音（音节距离 0）且没有并列时给出（如“微心”→“微信”），否则为 None；
+        候选为读音相同/相近的前 n 个 key，按编辑距离、音节数、插入顺序排序，交给选择对话框。
+        """
+        hits = self._phonetic.search(cmd)
+        hits.sort(key=lambda h: (h[0], h[1], self._seq[h[2]]))
+        sure = None
+        if hits and hits[0][0] == 0 and (len(hits) == 1 or hits[0][:2] != hits[1][:2]):
+            sure = hits[0][2]
+        return sure, [k for _, _, k in hits[:n]]
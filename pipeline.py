@@ -0,0 +1,175 @@
+"""
+识别流水线
+==========
+采集与识别解耦的生产者/消费者模型：
+• 采集线程只负责从麦克风切出语音段，`submit()` 放入有界队列后立即继续采集
+• 若干识别工作线程并行消费队列（网络往返互相重叠）
+• 结果按提交顺序重排后再回调，保证指令执行顺序与说话顺序一致
+
+队列满时丢弃最旧的待识别语音段（采集永不阻塞），并计入统计。
+`stats.snapshot()` 提供队列深度与各阶段耗时计数。
+"""
+
+import queue
+import threading
+import time
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 统计
+# ────────────────────────────────────────────────────────────────────────────────
+class LatencyStat:
+    __slots__ = ("count", "total", "max", "last")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def as_dict(self) -> dict:
+        avg = self.total / self.count if self.count else 0.0
+        return {"count": self.count, "avg_ms": avg * 1e3,
+                "max_ms": self.max * 1e3, "last_ms": self.last * 1e3}
+
+
+class PipelineStats:
+    STAGES = ("capture", "queue", "recognize", "reorder")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = {s: LatencyStat() for s in self.STAGES}
+        self.submitted = self.completed = self.dropped = self.errors = 0
+        self.depth = self.max_depth = 0
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            self.latency[stage].add(seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "depth": self.depth, "max_depth": self.max_depth,
+                "submitted": self.submitted, "completed": self.completed,
+                "dropped": self.dropped, "errors": self.errors,
+                "latency": {s: st.as_dict() for s, st in self.latency.items()},
+            }
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 流水线
+# ────────────────────────────────────────────────────────────────────────────────
+_STOP = object()
+
+
+class RecognitionPipeline:
+    def __init__(self, recognize, on_result, on_error, workers: int = 2, maxsize: int = 8):
+        """
+        recognize(item) -> str   : 在工作线程中调用，可抛异常
+        on_result(text)          : 按提交顺序回调
+        on_error(exc)            : 同上，识别失败时回调
+        """
+        self.recognize = recognize
+        self.on_result = on_result
+        self.on_error = on_error
+        self.stats = PipelineStats()
+        self._queue: queue.Queue = queue.Queue(maxsize)
+        self._workers = [threading.Thread(target=self._work, daemon=True)
+                         for _ in range(max(1, workers))]
+        self._seq = 0
+        self._next = 0                        # 下一个应回调的序号
+        self._done: dict[int, tuple] = {}     # 已完成、待按序回调的结果
+        self._order_lock = threading.Lock()
+
+    def start(self):
+        for w in self._workers:
+            w.start()
+
+    def stop(self, wait: bool = True):
+        for _ in self._workers:
+            self._put((None, _STOP, 0.0))
+        if wait:
+            for w in self._workers:
+                w.join()
+
+    # —— 采集端 ──────────────────────────────────────────────────────────────
+    def submit(self, item, capture_time: float = 0.0):
+        """放入一个待识别语音段；capture_time 为采集该段花费的秒数"""
+        st = self.stats
+        seq = self._seq
+        self._seq += 1
+        if capture_time:
+            st.record("capture", capture_time)
+        with st._lock:
+            st.submitted += 1
+        self._put((seq, item, time.perf_counter()))
+
+    def _put(self, entry):
+        while True:
+            try:
+                self._queue.put_nowait(entry)
+                break
+            except queue.Full:
+                try:
+                    old = self._queue.get_nowait()
+                except queue.Empty:
+                    continue
+                if old[1] is _STOP:           # 停止标记不能丢
+                    self._queue.put(old)
+                    continue
+                with self.stats._lock:
+                    self.stats.dropped += 1
+                self._finish(old[0], None, time.perf_counter())
+        self._update_depth()
+
+    def _update_depth(self):
+        st = self.stats
+        with st._lock:
+            st.depth = self._queue.qsize()
+            if st.depth > st.max_depth:
+                st.max_depth = st.depth
+
+    # —— 识别端 ──────────────────────────────────────────────────────────────
+    def _work(self):
+        while True:
+            seq, item, t_put = self._queue.get()
+            self._update_depth()
+            if item is _STOP:
+                return
+            t0 = time.perf_counter()
+            self.stats.record("queue", t0 - t_put)
+            try:
+                outcome = (True, self.recognize(item))
+            except Exception as e:
+                outcome = (False, e)
+            t1 = time.perf_counter()
+            self.stats.record("recognize", t1 - t0)
+            self._finish(seq, outcome, t1)
+
+    def _finish(self, seq: int, outcome, t_done: float):
+        # outcome 为 None 表示该段被丢弃，只占位推进序号
+        with self._order_lock:
+            self._done[seq] = (outcome, t_done)
+            while self._next in self._done:
+                outcome, t_done = self._done.pop(self._next)
+                self._next += 1
+                if outcome is None:
+                    continue
+                self.stats.record("reorder", time.perf_counter() - t_done)
+                ok, value = outcome
+                with self.stats._lock:
+                    if ok:
+                        self.stats.completed += 1
+                    else:
+                        self.stats.errors += 1
+                if ok:
+                    self.on_result(value)
+                else:
+                    self.on_error(value)
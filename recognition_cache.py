@@ -0,0 +1,134 @@
+"""
+识别结果缓存
+============
+反复说的短指令（“打开微信”“关闭标签页”）不必每次都走远程识别：
+• 每段语音计算一个紧凑的声学指纹：统一到 16 kHz 后分帧做 FFT，
+  取对数频带能量并做均值归一，时间轴插值到固定帧数，再量化为 int8
+• 新语音与缓存中的指纹逐一（向量化）比较相关系数，足够接近即直接返回文本
+• LRU 淘汰 + 容量上限 + 命中/未命中统计
+
+`CachedBackend` 包装任意 `RecognizerBackend`，对调用方透明。
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from recognizers import RecognizerBackend
+
+RATE = 16000
+WIN = 400            # 25 ms
+HOP = 160            # 10 ms
+BANDS = 16
+STEPS = 32           # 时间轴归一化后的帧数
+
+# 对数间隔的频带边界（FFT bin 下标，约 100 Hz – 7 kHz）
+_EDGES = np.unique((np.geomspace(100, 7000, BANDS + 1) * (WIN // 2 + 1) / (RATE / 2)).astype(int))
+_WINDOW = np.hanning(WIN).astype(np.float32)
+
+
+def fingerprint(pcm: bytes) -> tuple[np.ndarray, float] | None:
+    """16 kHz / 16-bit PCM → (int8 指纹向量, 时长秒)；过短返回 None"""
+    x = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+    n = 1 + (len(x) - WIN) // HOP
+    if n < 4:
+        return None
+    idx = np.arange(WIN)[None, :] + HOP * np.arange(n)[:, None]
+    spec = np.abs(np.fft.rfft(x[idx] * _WINDOW, axis=1)) ** 2
+    csum = np.cumsum(spec, axis=1)
+    bands = csum[:, _EDGES[1:] - 1] - csum[:, _EDGES[:-1] - 1]
+    feat = np.log(bands + 1e-3)
+    feat -= feat.mean(axis=0)                       # 去掉音量/信道差异
+    # 时间轴线性插值到固定帧数，吸收语速差异
+    src = np.linspace(0, n - 1, STEPS)
+    lo = np.floor(src).astype(int)
+    hi = np.minimum(lo + 1, n - 1)
+    w = (src - lo)[:, None]
+    feat = feat[lo] * (1 - w) + feat[hi] * w
+    feat = feat.ravel()
+    scale = np.abs(feat).max() or 1.0
+    return np.round(feat / scale * 127).astype(np.int8), len(x) / RATE
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# LRU 缓存
+# ────────────────────────────────────────────────────────────────────────────────
+class RecognitionCache:
+    def __init__(self, max_size: int = 128, threshold: float = 0.92, max_len: float = 4.0):
+        self.max_size = max_size
+        self.threshold = threshold      # 相关系数不低于此值视为同一句话
+        self.max_len = max_len          # 超过此时长（秒）的语音不缓存：多为口述而非指令
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[int, tuple] = OrderedDict()   # id → (指纹, 时长, 文本)
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def lookup(self, fp: np.ndarray, duration: float) -> str | None:
+        with self._lock:
+            if self._entries:
+                ids = list(self._entries)
+                mat = np.stack([self._entries[i][0] for i in ids]).astype(np.float32)
+                durs = np.array([self._entries[i][1] for i in ids])
+                v = fp.astype(np.float32)
+                v -= v.mean()
+                mat -= mat.mean(axis=1, keepdims=True)
+                denom = np.linalg.norm(mat, axis=1) * (np.linalg.norm(v) or 1.0)
+                corr = mat @ v / np.where(denom == 0, 1.0, denom)
+                # 时长相差超过 30% 的不可能是同一句
+                corr[np.abs(durs - duration) > 0.3 * max(duration, 1e-3)] = -1.0
+                best = int(np.argmax(corr))
+                if corr[best] >= self.threshold:
+                    key = ids[best]
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._entries[key][2]
+            self.misses += 1
+            return None
+
+    def store(self, fp: np.ndarray, duration: float, text: str):
+        if duration > self.max_len:
+            return
+        with self._lock:
+            self._entries[self._next_id] = (fp, duration, text)
+            self._next_id += 1
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 带缓存的识别后端
+# ────────────────────────────────────────────────────────────────────────────────
+class CachedBackend(RecognizerBackend):
+    def __init__(self, backend: RecognizerBackend, cache: RecognitionCache | None = None):
+        self.backend = backend
+        self.cache = cache if cache is not None else RecognitionCache()
+        self.name = backend.name
+        self.streaming = backend.streaming
+        self.sample_rate = backend.sample_rate
+
+    def stream(self):
+        return self.backend.stream()
+
+    def recognize(self, audio) -> str:
+        fp = fingerprint(audio.get_raw_data(convert_rate=RATE, convert_width=2))
+        if fp is None:
+            return self.backend.recognize(audio)
+        text = self.cache.lookup(*fp)
+        if text is None:
+            text = self.backend.recognize(audio)
+            self.cache.store(*fp, text)
+        return text
@@ -0,0 +1,124 @@
+"""
+语音识别后端
+============
+统一的识别接口，`SpeechThread` / `speech_once` 只依赖这里的 `RecognizerBackend`：
+• GoogleBackend ：Google Web API（原有实现，需要联网）
+• VoskBackend   ：Vosk 本地离线引擎（纯 CPU），支持流式解码，边说边出部分结果
+
+两个后端都沿用 speech_recognition 的异常：无法识别抛 `sr.UnknownValueError`，
+引擎/服务不可用抛 `sr.RequestError`，调用方的错误处理无需区分后端。
+"""
+
+import json
+
+import speech_recognition as sr
+
+try:
+    import vosk
+except ImportError:          # 未安装时只能使用在线后端
+    vosk = None
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 后端接口
+# ────────────────────────────────────────────────────────────────────────────────
+class RecognitionStream:
+    """流式识别会话：逐块送入 PCM 数据，随时可取部分结果"""
+
+    def feed(self, chunk: bytes) -> tuple[str, bool]:
+        """送入一块音频，返回 (当前文本, 是否已到句尾)"""
+        raise NotImplementedError
+
+    def finish(self) -> str:
+        """结束会话并返回最终文本"""
+        raise NotImplementedError
+
+
+class RecognizerBackend:
+    name = ""
+    streaming = False           # 是否支持 stream()
+    sample_rate: int | None = None   # 解码采样率（None = 不限）
+
+    def recognize(self, audio: sr.AudioData) -> str:
+        raise NotImplementedError
+
+    def stream(self) -> RecognitionStream:
+        raise NotImplementedError(f"{self.name} 不支持流式识别")
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Google Web API
+# ────────────────────────────────────────────────────────────────────────────────
+class GoogleBackend(RecognizerBackend):
+    name = "google"
+
+    def __init__(self, language: str = "zh-CN"):
+        self.language = language
+        self._rec = sr.Recognizer()
+
+    def recognize(self, audio: sr.AudioData) -> str:
+        return self._rec.recognize_google(audio, language=self.language)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Vosk 离线引擎
+# ────────────────────────────────────────────────────────────────────────────────
+def _vosk_text(result: str, key: str = "text") -> str:
+    # 中文模型按词输出并以空格分隔，拼回连续文本
+    return json.loads(result).get(key, "").replace(" ", "")
+
+
+class _VoskStream(RecognitionStream):
+    def __init__(self, model, sample_rate: int):
+        self._rec = vosk.KaldiRecognizer(model, sample_rate)
+        self._final = []
+
+    def feed(self, chunk: bytes) -> tuple[str, bool]:
+        if not isinstance(chunk, bytes):        # 音频缓冲区的 memoryview；vosk 只接受 bytes
+            chunk = bytes(chunk)
+        if self._rec.AcceptWaveform(chunk):
+            self._final.append(_vosk_text(self._rec.Result()))
+            return "".join(self._final), True
+        return "".join(self._final) + _vosk_text(self._rec.PartialResult(), "partial"), False
+
+    def finish(self) -> str:
+        self._final.append(_vosk_text(self._rec.FinalResult()))
+        return "".join(self._final)
+
+
+class VoskBackend(RecognizerBackend):
+    name = "vosk"
+    streaming = True
+    sample_rate = 16000
+
+    def __init__(self, model_path: str):
+        if vosk is None:
+            raise sr.RequestError("未安装 vosk，无法使用离线识别")
+        vosk.SetLogLevel(-1)
+        try:
+            self._model = vosk.Model(model_path)
+        except Exception as e:
+            raise sr.RequestError(f"无法加载离线模型: {model_path}") from e
+
+    def stream(self) -> RecognitionStream:
+        return _VoskStream(self._model, self.sample_rate)
+
+    def recognize(self, audio: sr.AudioData) -> str:
+        s = self.stream()
+        s.feed(audio.get_raw_data(convert_rate=self.sample_rate, convert_width=2))
+        text = s.finish()
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 工厂
+# ────────────────────────────────────────────────────────────────────────────────
+BACKENDS = {"google": "Google（在线）", "vosk": "Vosk（离线）"}
+
+
+def create_backend(name: str, model_path: str = "") -> RecognizerBackend:
+    if name == "vosk":
+        return VoskBackend(model_path)
+    return GoogleBackend()
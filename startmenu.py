@@ -0,0 +1,251 @@
+"""
+开始菜单导入
+============
+• 纯 Python 解析 `.lnk` 快捷方式（MS-SHLLINK 格式），不依赖 COM / WScript.Shell，
+  在 Linux 上也能对样例文件做解析与测试
+• 线程池并行解析，进度回调，支持中途取消
+• 按 (mtime, size) 缓存解析结果并持久化，再次导入只解析有变化的快捷方式
+"""
+
+import json
+import os
+import re
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+START_MENU_DIRS = [
+    os.path.expandvars(r"%APPDATA%\Microsoft\Windows\Start Menu\Programs"),
+    r"C:\ProgramData\Microsoft\Windows\Start Menu\Programs",
+]
+
+# LinkFlags
+_HAS_ID_LIST = 0x01
+_HAS_LINK_INFO = 0x02
+_HAS_NAME = 0x04
+_HAS_RELATIVE_PATH = 0x08
+_HAS_WORKING_DIR = 0x10
+_HAS_ARGUMENTS = 0x20
+_HAS_ICON = 0x40
+_IS_UNICODE = 0x80
+
+_ENV_BLOCK = 0xA0000001
+_LNK_CLSID = bytes.fromhex("0114020000000000c000000000000046")
+
+
+class LnkError(ValueError):
+    pass
+
+
+def _cstr(data: bytes, off: int, unicode: bool = False) -> str:
+    if unicode:
+        end = off
+        while end + 1 < len(data) and data[end:end + 2] != b"\0\0":
+            end += 2
+        return data[off:end].decode("utf-16-le", "replace")
+    end = data.find(b"\0", off)
+    return data[off:end if end >= 0 else len(data)].decode("mbcs" if os.name == "nt" else "latin-1",
+                                                            "replace")
+
+
+def _expand_env(path: str) -> str:
+    # Windows 风格 %VAR%，与平台无关
+    return re.sub(r"%([^%]+)%", lambda m: os.environ.get(m.group(1), m.group(0)), path)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# .lnk 解析
+# ────────────────────────────────────────────────────────────────────────────────
+def _parse_id_list(data: bytes) -> str:
+    """从 LinkTargetIDList 中拼出文件系统路径（盘符项 + 文件项）"""
+    parts, off = [], 0
+    while off + 2 <= len(data):
+        size = struct.unpack_from("<H", data, off)[0]
+        if size == 0:
+            break
+        item = data[off:off + size]
+        off += size
+        if len(item) < 3:
+            continue
+        typ = item[2] & 0x70
+        if typ == 0x20:                                  # 卷：“C:\”
+            parts = [_cstr(item, 3).rstrip("\\") + "\\"]
+        elif typ == 0x30 and len(item) > 14:             # 文件/文件夹
+            name = _cstr(item, 14, unicode=bool(item[2] & 0x04))
+            # 扩展块 0xBEEF0004 中有长文件名（Unicode），其偏移随版本变化
+            ext = item.find(b"\x04\x00\xef\xbe")
+            if ext >= 4:
+                ver = struct.unpack_from("<H", item, ext - 2)[0]
+                if ver >= 3:
+                    long_off = (ext + 16 + (18 if ver >= 7 else 0)
+                                + (4 if ver >= 8 else 0) + (4 if ver >= 9 else 0))
+                    if long_off < len(item):
+                        name = _cstr(item, long_off, unicode=True) or name
+            parts.append(name)
+    if not parts or not parts[0].endswith(":\\"):
+        return ""
+    return parts[0] + "\\".join(parts[1:])
+
+
+def _parse_link_info(data: bytes) -> str:
+    hdr_size, flags = struct.unpack_from("<II", data, 4)
+    local_off, _, suffix_off = struct.unpack_from("<III", data, 16)
+    if not flags & 0x1:                                  # 无本地路径（网络共享等）
+        return ""
+    if hdr_size >= 0x24:
+        local_u, suffix_u = struct.unpack_from("<II", data, 28)
+        if local_u:
+            return _cstr(data, local_u, True) + _cstr(data, suffix_u, True)
+    return _cstr(data, local_off) + _cstr(data, suffix_off)
+
+
+def parse_lnk(data: bytes) -> dict:
+    """解析 .lnk 内容，返回 {"target", "arguments", "working_dir", "relative_path"}"""
+    if len(data) < 76 or struct.unpack_from("<I", data, 0)[0] != 0x4C or data[4:20] != _LNK_CLSID:
+        raise LnkError("不是有效的快捷方式文件")
+    flags = struct.unpack_from("<I", data, 20)[0]
+    off = 76
+    id_path = ""
+    try:
+        if flags & _HAS_ID_LIST:
+            size = struct.unpack_from("<H", data, off)[0]
+            id_path = _parse_id_list(data[off + 2:off + 2 + size])
+            off += 2 + size
+        info_path = ""
+        if flags & _HAS_LINK_INFO:
+            size = struct.unpack_from("<I", data, off)[0]
+            info_path = _parse_link_info(data[off:off + size])
+            off += size
+
+        strings = {}
+        unicode = bool(flags & _IS_UNICODE)
+        for flag, name in ((_HAS_NAME, "name"), (_HAS_RELATIVE_PATH, "relative_path"),
+                           (_HAS_WORKING_DIR, "working_dir"), (_HAS_ARGUMENTS, "arguments"),
+                           (_HAS_ICON, "icon")):
+            if flags & flag:
+                count = struct.unpack_from("<H", data, off)[0]
+                off += 2
+                n = count * 2 if unicode else count
+                raw = data[off:off + n]
+                strings[name] = raw.decode("utf-16-le", "replace") if unicode else _cstr(raw + b"\0", 0)
+                off += n
+
+        env_path = ""
+        while off + 8 <= len(data):
+            size, sig = struct.unpack_from("<II", data, off)
+            if size < 8:
+                break
+            if sig == _ENV_BLOCK and size >= 8 + 260 + 520:
+                env_path = _cstr(data, off + 8 + 260, True) or _cstr(data, off + 8)
+            off += size
+    except struct.error as e:
+        raise LnkError("快捷方式文件已损坏") from e
+
+    target = info_path or _expand_env(env_path) or id_path
+    return {
+        "target": target,
+        "arguments": strings.get("arguments", ""),
+        "working_dir": strings.get("working_dir", ""),
+        "relative_path": strings.get("relative_path", ""),
+    }
+
+
+def resolve_lnk(path: str) -> str:
+    """返回快捷方式指向的目标路径；仅有相对路径时相对 .lnk 所在目录解析"""
+    with open(path, "rb") as f:
+        info = parse_lnk(f.read())
+    target = info["target"]
+    if not target and info["relative_path"]:
+        target = os.path.normpath(os.path.join(os.path.dirname(path), info["relative_path"]))
+    return target
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 扫描器
+# ────────────────────────────────────────────────────────────────────────────────
+class StartMenuScanner:
+    def __init__(self, cache_file: str = "lnk_cache.json", workers: int = 8):
+        self.cache_file = cache_file
+        self.workers = workers
+        self.cache: dict[str, list] = self._load_cache()    # lnk 路径 → [mtime_ns, size, 目标]
+        self.parsed = 0                                     # 本次实际解析的文件数
+
+    def _load_cache(self) -> dict:
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_cache(self):
+        tmp = self.cache_file + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.cache, f, ensure_ascii=False)
+        os.replace(tmp, self.cache_file)
+
+    @staticmethod
+    def list_links(bases) -> list[str]:
+        links = []
+        for base in bases:
+            for root, _, files in os.walk(base):
+                links.extend(os.path.join(root, f) for f in files if f.endswith(".lnk"))
+        return links
+
+    @staticmethod
+    def _resolve(lnk: str) -> str:
+        try:
+            return resolve_lnk(lnk)
+        except (OSError, LnkError):
+            return ""
+
+    def scan(self, bases=START_MENU_DIRS, progress=None,
+             cancel: threading.Event | None = None) -> list[tuple[str, str]]:
+        """
+        返回 [(程序名, exe 路径)]，顺序同目录遍历顺序。
+        progress(done, total) 在工作线程中回调；cancel 置位后尽快返回（结果不完整）。
+        """
+        links = self.list_links(bases)
+        total = len(links)
+        targets: dict[str, str] = {}
+        todo = []
+        for lnk in links:
+            try:
+                st = os.stat(lnk)
+            except OSError:
+                continue
+            hit = self.cache.get(lnk)
+            if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+                targets[lnk] = hit[2]
+            else:
+                todo.append((lnk, st))
+
+        done = total - len(todo)
+        if progress:
+            progress(done, total)
+        self.parsed = 0
+        if todo:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                futures = {pool.submit(self._resolve, lnk): (lnk, st) for lnk, st in todo}
+                for fut in as_completed(futures):
+                    lnk, st = futures[fut]
+                    targets[lnk] = fut.result()
+                    self.cache[lnk] = [st.st_mtime_ns, st.st_size, targets[lnk]]
+                    self.parsed += 1
+                    done += 1
+                    if progress:
+                        progress(done, total)
+                    if cancel is not None and cancel.is_set():
+                        for f in futures:
+                            f.cancel()
+                        break
+
+        # 清理已删除的快捷方式
+        for lnk in set(self.cache) - set(links):
+            del self.cache[lnk]
+
+        result = []
+        for lnk in links:
+            target = targets.get(lnk, "")
+            if target.lower().endswith(".exe"):
+                result.append((os.path.splitext(os.path.basename(lnk))[0], target))
+        return result
@@ -0,0 +1,133 @@
+"""
+指令存储
+========
+`command_map.json` + 追加日志的持久化字典，替代每次改动都整体重写 JSON：
+• 快照：`command_map.json`（格式不变，旧文件无需转换即被当作快照读入）
+• 日志：`command_map.json.journal`，每次增/删/改名追加一行 JSON，写入量与改动大小成正比
+• 压缩：日志累计到一定条数时，把当前内容写入临时文件、fsync 后原子替换快照，再清空日志
+• 崩溃安全：快照只会被完整替换；日志最后一行若写了一半，加载时直接忽略
+• 惰性加载：首次访问时才读取快照并重放日志（GUI 在窗口显示后的后台启动阶段才访问）
+"""
+
+import json
+import os
+from collections.abc import MutableMapping
+
+
+class CommandStore(MutableMapping):
+    def __init__(self, path: str, compact_every: int = 500):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.compact_every = compact_every
+        self._data: dict | None = None
+        self._journal = None          # 追加写句柄
+        self._pending = 0             # 日志中的记录数
+
+    # —— 加载 ────────────────────────────────────────────────────────────────
+    @property
+    def data(self) -> dict:
+        if self._data is None:
+            self._load()
+        return self._data
+
+    def _load(self):
+        data = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        self._pending = 0
+        if os.path.exists(self.journal_path):
+            good = 0
+            with open(self.journal_path, "rb") as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError
+                        rec = json.loads(line)
+                    except ValueError:       # 写入中断留下的半行
+                        break
+                    self._apply(data, rec)
+                    self._pending += 1
+                    good += len(line)
+                broken = f.seek(0, os.SEEK_END) > good
+            if broken:                       # 截掉残行，后续追加才不会与它粘连
+                with open(self.journal_path, "r+b") as f:
+                    f.truncate(good)
+        self._data = data
+
+    @staticmethod
+    def _apply(data: dict, rec: dict):
+        op = rec.get("op")
+        if op == "set":
+            data[rec["k"]] = rec["v"]
+        elif op == "del":
+            data.pop(rec["k"], None)
+        elif op == "ren" and rec["k"] in data and rec["n"] not in data:
+            data[rec["n"]] = data.pop(rec["k"])
+
+    # —— 日志 ────────────────────────────────────────────────────────────────
+    def _append(self, rec: dict):
+        if self._journal is None:
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._journal.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        self._journal.flush()
+        self._pending += 1
+
+    def flush(self):
+        """确保已写入的改动落盘；日志过长时顺带压缩"""
+        if self._journal is not None:
+            os.fsync(self._journal.fileno())
+        if self._pending >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        """把当前内容原子写入快照并清空日志"""
+        data = self.data
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        # 快照已含全部改动；此时崩溃只会重放一遍幂等的旧日志
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        with open(self.journal_path, "w", encoding="utf-8"):
+            pass
+        self._pending = 0
+
+    def close(self):
+        self.flush()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    # —— 字典接口 ────────────────────────────────────────────────────────────
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+        self._append({"op": "set", "k": key, "v": value})
+
+    def __delitem__(self, key):
+        del self.data[key]
+        self._append({"op": "del", "k": key})
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def rename(self, old, new):
+        """改名为单条日志记录，不会在中途崩溃时丢失条目；新 key 排到末尾"""
+        data = self.data
+        if old not in data or new in data:
+            raise KeyError(new if old in data else old)
+        data[new] = data.pop(old)
+        self._append({"op": "ren", "k": old, "n": new})
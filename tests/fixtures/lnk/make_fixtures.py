@@ -0,0 +1,159 @@
+"""
+生成 .lnk 样例文件
+==================
+按 MS-SHLLINK 规范逐字节拼出几个快捷方式，供 tests/test_startmenu.py 使用；
+结构与 Windows 生成的文件一致（根项 CLSID、卷项、带 0xBEEF0004 扩展块的文件项、
+LinkInfo、StringData、EnvironmentVariableDataBlock），不依赖 startmenu.py 的解析代码。
+
+    $ python tests/fixtures/lnk/make_fixtures.py      # 重新生成本目录下的 .lnk
+"""
+
+import os
+import struct
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+LNK_CLSID = bytes.fromhex("0114020000000000c000000000000046")
+MY_COMPUTER = bytes.fromhex("e04fd020ea3a6910a2d808002b30309d")
+
+HAS_ID_LIST, HAS_LINK_INFO, HAS_NAME, HAS_RELATIVE_PATH = 0x01, 0x02, 0x04, 0x08
+HAS_WORKING_DIR, HAS_ARGUMENTS, HAS_ICON, IS_UNICODE = 0x10, 0x20, 0x40, 0x80
+HAS_EXP_STRING = 0x200
+
+
+def _z(s: str, unicode: bool = False) -> bytes:
+    return (s + "\0").encode("utf-16-le" if unicode else "ascii")
+
+
+# —— LinkTargetIDList ────────────────────────────────────────────────────────
+def root_item() -> bytes:
+    body = b"\x1f\x50" + MY_COMPUTER
+    return struct.pack("<H", 2 + len(body)) + body
+
+
+def volume_item(drive: str) -> bytes:
+    body = b"\x2f" + _z(drive)
+    body += b"\0" * (23 - len(body))                 # Windows 固定写成 0x19 字节
+    return struct.pack("<H", 2 + len(body)) + body
+
+
+def file_item(short: str, long: str, ver: int, folder: bool) -> bytes:
+    """文件/文件夹项：8.3 短名 + 扩展块 0xBEEF0004（内含 Unicode 长文件名）"""
+    head = bytes([0x31 if folder else 0x32, 0]) + struct.pack("<IHHH", 0 if folder else 1024,
+                                                             0x5A21, 0x6C3B, 0x10 if folder else 0x20)
+    name = _z(short)
+    if len(name) % 2:
+        name += b"\0"
+    ext = struct.pack("<HIII", ver, 0xBEEF0004, 0x5A215A21, 0x5A215A21)   # 版本、签名、创建/访问时间
+    ext += struct.pack("<H", 0x2E if ver >= 7 else 0x14)
+    if ver >= 7:
+        ext += b"\0\0" + struct.pack("<Q", 0x0001000000001234) + b"\0" * 8
+    ext += struct.pack("<H", 0)                      # 本地化名称长度（ver >= 3）
+    if ver >= 9:
+        ext += b"\0" * 4
+    if ver >= 8:
+        ext += b"\0" * 4
+    ext += _z(long, unicode=True)
+    ext += struct.pack("<H", 14 + len(name))         # 扩展块起点相对本项的偏移
+    ext = struct.pack("<H", 2 + len(ext)) + ext
+    body = head + name + ext
+    return struct.pack("<H", 2 + len(body)) + body
+
+
+def id_list(path: str, ver: int, shorts: dict) -> bytes:
+    drive, *names = path.split("\\")
+    items = root_item() + volume_item(drive + "\\")
+    for i, name in enumerate(names):
+        items += file_item(shorts.get(name, name.upper()), name, ver, folder=i < len(names) - 1)
+    items += b"\0\0"                                 # TerminalID
+    return struct.pack("<H", len(items)) + items
+
+
+# —— LinkInfo ────────────────────────────────────────────────────────────────
+def link_info(base: str, suffix: str = "", unicode: bool = False) -> bytes:
+    hdr = 0x24 if unicode else 0x1C
+    volume = struct.pack("<IIII", 0x11, 3, 0x1234ABCD, 0x10) + b"\0"     # DRIVE_FIXED，卷标为空
+    local_off = hdr + len(volume)
+    ansi_base = _z(base if base.isascii() else "")
+    suffix_off = local_off + len(ansi_base)
+    ansi_suffix = _z(suffix if suffix.isascii() else "")
+    tail = volume + ansi_base + ansi_suffix
+    extra = b""
+    if unicode:
+        local_u = hdr + len(tail)
+        suffix_u = local_u + len(_z(base, True))
+        extra = struct.pack("<II", local_u, suffix_u)
+        tail += _z(base, True) + _z(suffix, True)
+    size = hdr + len(tail)
+    return struct.pack("<IIIIIII", size, hdr, 0x1, hdr, local_off, 0, suffix_off) + extra + tail
+
+
+# —— StringData / ExtraData ──────────────────────────────────────────────────
+def string_data(s: str) -> bytes:
+    return struct.pack("<H", len(s)) + s.encode("utf-16-le")
+
+
+def env_block(path: str) -> bytes:
+    ansi = path.encode("ascii").ljust(260, b"\0")
+    uni = path.encode("utf-16-le").ljust(520, b"\0")
+    return struct.pack("<II", 8 + 260 + 520, 0xA0000001) + ansi + uni
+
+
+def lnk(flags: int, *sections: bytes, extra: bytes = b"") -> bytes:
+    header = struct.pack("<I16sII", 0x4C, LNK_CLSID, flags | IS_UNICODE, 0x20)
+    header += b"\0" * 24 + struct.pack("<IiIH", 1024, 0, 1, 0) + b"\0" * 10
+    assert len(header) == 76
+    return header + b"".join(sections) + extra + b"\0\0\0\0"             # TerminalBlock
+
+
+FIXTURES = {
+    # 只有 IDList（Windows 10，扩展块版本 9）；中文长文件名只在扩展块里
+    "wechat_idlist_v9.lnk": lnk(
+        HAS_ID_LIST | HAS_WORKING_DIR | HAS_ARGUMENTS,
+        id_list(r"C:\Program Files\腾讯软件\WeChat\WeChat.exe", 9,
+                {"Program Files": "PROGRA~1", "腾讯软件": "D8F5E~1"}),
+        string_data(r"C:\Program Files\腾讯软件\WeChat"),
+        string_data("--autostart"),
+    ),
+    # Windows 8（版本 8）：长文件名前少 4 个字节
+    "code_idlist_v8.lnk": lnk(
+        HAS_ID_LIST,
+        id_list(r"D:\Tools\Microsoft VS Code\Code.exe", 8, {"Microsoft VS Code": "MICROS~1"}),
+    ),
+    # Windows XP（版本 3）：没有 NTFS 文件引用等字段
+    "firefox_idlist_v3.lnk": lnk(
+        HAS_ID_LIST | HAS_NAME,
+        id_list(r"C:\Program Files\Mozilla Firefox\firefox.exe", 3,
+                {"Program Files": "PROGRA~1", "Mozilla Firefox": "MOZILL~1"}),
+        string_data("Firefox"),
+    ),
+    # IDList + ANSI LinkInfo（头部 0x1C）：以 LinkInfo 为准
+    "notepad_linkinfo.lnk": lnk(
+        HAS_ID_LIST | HAS_LINK_INFO | HAS_RELATIVE_PATH,
+        id_list(r"C:\Windows\System32\notepad.exe", 9, {}),
+        link_info(r"C:\Windows\System32\notepad.exe"),
+        string_data(r"..\..\..\..\..\Windows\System32\notepad.exe"),
+    ),
+    # 只有 Unicode LinkInfo（头部 0x24），路径分成 LocalBasePath + CommonPathSuffix
+    "qq_linkinfo_unicode.lnk": lnk(
+        HAS_LINK_INFO,
+        link_info("C:\\Program Files (x86)\\腾讯\\", r"QQ\Bin\QQ.exe", unicode=True),
+    ),
+    # MSI 安装的快捷方式常见：目标只写在 EnvironmentVariableDataBlock 里
+    "tool_env_block.lnk": lnk(
+        HAS_EXP_STRING,
+        extra=env_block(r"%LNK_TEST_ROOT%\Tool\tool.exe"),
+    ),
+    # 只有相对路径：相对 .lnk 所在目录解析
+    "relative_only.lnk": lnk(
+        HAS_RELATIVE_PATH,
+        string_data(r"..\portable\app.exe"),
+    ),
+}
+
+
+if __name__ == "__main__":
+    for name, data in FIXTURES.items():
+        with open(os.path.join(HERE, name), "wb") as f:
+            f.write(data)
+        print(f"{name:28s} {len(data):5d} 字节")
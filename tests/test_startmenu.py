@@ -0,0 +1,97 @@
+"""startmenu.parse_lnk / resolve_lnk / StartMenuScanner；样例见 fixtures/lnk（由 make_fixtures.py 生成）"""
+
+import os
+import shutil
+
+import pytest
+
+from startmenu import LnkError, StartMenuScanner, parse_lnk, resolve_lnk
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "lnk")
+
+
+def load(name: str) -> bytes:
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+# —— LinkTargetIDList + 0xBEEF0004 长文件名 ─────────────────────────────────
+@pytest.mark.parametrize("name, target", [
+    ("wechat_idlist_v9.lnk", "C:\\Program Files\\腾讯软件\\WeChat\\WeChat.exe"),
+    ("code_idlist_v8.lnk", "D:\\Tools\\Microsoft VS Code\\Code.exe"),
+    ("firefox_idlist_v3.lnk", "C:\\Program Files\\Mozilla Firefox\\firefox.exe"),
+])
+def test_id_list_long_names(name, target):
+    # 各项的 8.3 短名（PROGRA~1 等）都被扩展块里的长文件名替换
+    assert parse_lnk(load(name))["target"] == target
+
+
+def test_string_data():
+    info = parse_lnk(load("wechat_idlist_v9.lnk"))
+    assert info["arguments"] == "--autostart"
+    assert info["working_dir"] == "C:\\Program Files\\腾讯软件\\WeChat"
+    assert info["relative_path"] == ""
+
+
+# —— LinkInfo ────────────────────────────────────────────────────────────────
+def test_link_info_ansi():
+    info = parse_lnk(load("notepad_linkinfo.lnk"))
+    assert info["target"] == "C:\\Windows\\System32\\notepad.exe"
+    assert info["relative_path"] == "..\\..\\..\\..\\..\\Windows\\System32\\notepad.exe"
+
+
+def test_link_info_unicode_base_and_suffix():
+    assert parse_lnk(load("qq_linkinfo_unicode.lnk"))["target"] == \
+        "C:\\Program Files (x86)\\腾讯\\QQ\\Bin\\QQ.exe"
+
+
+# —— EnvironmentVariableDataBlock ────────────────────────────────────────────
+def test_env_block_expanded(monkeypatch):
+    monkeypatch.setenv("LNK_TEST_ROOT", "E:\\Apps")
+    assert parse_lnk(load("tool_env_block.lnk"))["target"] == "E:\\Apps\\Tool\\tool.exe"
+
+
+def test_env_block_unknown_variable_kept(monkeypatch):
+    monkeypatch.delenv("LNK_TEST_ROOT", raising=False)
+    assert parse_lnk(load("tool_env_block.lnk"))["target"] == "%LNK_TEST_ROOT%\\Tool\\tool.exe"
+
+
+# —— 相对路径 / 损坏文件 ─────────────────────────────────────────────────────
+def test_relative_only_resolved_against_lnk_dir():
+    path = os.path.join(FIXTURES, "relative_only.lnk")
+    assert parse_lnk(load("relative_only.lnk"))["target"] == ""
+    assert resolve_lnk(path) == os.path.normpath(os.path.join(FIXTURES, "..\\portable\\app.exe"))
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"not a shortcut" * 10,
+    load("wechat_idlist_v9.lnk")[:4] + b"\0" * 16 + load("wechat_idlist_v9.lnk")[20:],   # CLSID 不对
+])
+def test_not_a_lnk(data):
+    with pytest.raises(LnkError):
+        parse_lnk(data)
+
+
+def test_truncated():
+    with pytest.raises(LnkError):
+        parse_lnk(load("wechat_idlist_v9.lnk")[:-60])
+
+
+# —— 扫描器 ──────────────────────────────────────────────────────────────────
+def test_scanner_uses_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("LNK_TEST_ROOT", "E:\\Apps")
+    menu = tmp_path / "Programs"
+    shutil.copytree(FIXTURES, menu, ignore=shutil.ignore_patterns("*.py"))
+    cache = str(tmp_path / "lnk_cache.json")
+
+    scanner = StartMenuScanner(cache)
+    found = dict(scanner.scan([str(menu)]))
+    assert scanner.parsed == 7
+    assert found["wechat_idlist_v9"] == "C:\\Program Files\\腾讯软件\\WeChat\\WeChat.exe"
+    assert found["tool_env_block"] == "E:\\Apps\\Tool\\tool.exe"
+    scanner.save_cache()
+
+    again = StartMenuScanner(cache)
+    assert dict(again.scan([str(menu)])) == found
+    assert again.parsed == 0                        # 全部命中缓存
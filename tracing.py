@@ -0,0 +1,117 @@
+"""
+延迟追踪
+========
+记录“说话 → 识别 → 匹配 → 执行”每一句话各阶段的耗时，定位慢在哪一环：
+• 每句话一个 Trace，沿途各阶段结束时 `mark(阶段名)`，只记一个 perf_counter_ns 时间戳
+• 完成的 Trace 写入定长环形缓冲（默认最近 512 句），常开也几乎没有开销
+• 按阶段统计 p50 / p95（仅在查询时计算）
+• 导出 JSON Lines，或 Chrome Trace 格式（chrome://tracing、Perfetto 可直接打开）
+
+阶段顺序（实时监听）：capture → queue → recognize → deliver → match → launch
+"""
+
+import itertools
+import json
+import threading
+import time
+
+STAGES = ("capture", "queue", "recognize", "deliver", "match", "launch")
+
+
+class Trace:
+    __slots__ = ("id", "marks", "meta")
+
+    def __init__(self, trace_id: int):
+        self.id = trace_id
+        self.marks = [("start", time.perf_counter_ns())]
+        self.meta: dict = {}
+
+    def mark(self, stage: str):
+        self.marks.append((stage, time.perf_counter_ns()))
+
+    def durations(self) -> dict[str, float]:
+        """阶段名 → 毫秒（该阶段 = 上一个标记到本标记）"""
+        out = {}
+        for (_, t0), (stage, t1) in zip(self.marks, self.marks[1:]):
+            out[stage] = (t1 - t0) / 1e6
+        return out
+
+    def total(self) -> float:
+        return (self.marks[-1][1] - self.marks[0][1]) / 1e6
+
+
+def _percentile(sorted_vals: list[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    i = min(len(sorted_vals) - 1, max(0, round(q * (len(sorted_vals) - 1))))
+    return sorted_vals[i]
+
+
+class Tracer:
+    def __init__(self, capacity: int = 512):
+        self.capacity = capacity
+        self._ring: list[Trace | None] = [None] * capacity
+        self._pos = 0
+        self._count = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.on_finish = None          # 可选回调（在调用 finish 的线程中执行）
+
+    def begin(self) -> Trace:
+        return Trace(next(self._ids))
+
+    def finish(self, trace: Trace | None):
+        if trace is None:
+            return
+        with self._lock:
+            self._ring[self._pos] = trace
+            self._pos = (self._pos + 1) % self.capacity
+            self._count += 1
+        if self.on_finish:
+            self.on_finish()
+
+    def traces(self) -> list[Trace]:
+        with self._lock:
+            if self._count < self.capacity:
+                return self._ring[:self._pos]
+            return self._ring[self._pos:] + self._ring[:self._pos]
+
+    # —— 统计 ────────────────────────────────────────────────────────────────
+    def percentiles(self, qs=(0.5, 0.95)) -> dict[str, tuple[float, ...]]:
+        """阶段名（含 total）→ 各分位数（默认 p50, p95），毫秒"""
+        per: dict[str, list[float]] = {}
+        for t in self.traces():
+            for stage, ms in t.durations().items():
+                per.setdefault(stage, []).append(ms)
+            per.setdefault("total", []).append(t.total())
+        out = {}
+        for stage, vals in per.items():
+            vals.sort()
+            out[stage] = tuple(_percentile(vals, q) for q in qs)
+        return out
+
+    def summary(self) -> str:
+        pc = self.percentiles()
+        if not pc:
+            return "暂无数据"
+        parts = [f"总计 p50 {pc['total'][0]:.0f} / p95 {pc['total'][1]:.0f} ms"]
+        for stage in STAGES:
+            if stage in pc:
+                parts.append(f"{stage} {pc[stage][0]:.0f}/{pc[stage][1]:.0f}")
+        return "  ".join(parts)
+
+    # —— 导出 ────────────────────────────────────────────────────────────────
+    def export_jsonl(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for t in self.traces():
+                f.write(json.dumps({"id": t.id, "start_ns": t.marks[0][1], "total_ms": t.total(),
+                                    "stages": t.durations(), **t.meta}, ensure_ascii=False) + "\n")
+
+    def export_chrome(self, path: str):
+        events = []
+        for t in self.traces():
+            for (_, t0), (stage, t1) in zip(t.marks, t.marks[1:]):
+                events.append({"name": stage, "ph": "X", "pid": 1, "tid": t.id,
+                               "ts": t0 / 1e3, "dur": (t1 - t0) / 1e3, "args": t.meta})
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
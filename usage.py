@@ -0,0 +1,71 @@
+"""
+使用习惯
+========
+记录模糊匹配时“哪句话最后选了哪个指令”，用来给候选排序，并在足够确定时直接替用户选：
+• 每条记录是一个随时间衰减的权重（半衰期默认 14 天），同一句话选得越多、越近，权重越高
+• 排序：先看这句话上的权重，再看该指令在所有话上的总权重，最后保持原有顺序
+• 自动选择：这句话上第一名的权重达到阈值，且占全部候选权重的大部分时，不再弹出选择框
+• 持久化沿用 `CommandStore`（快照 + 追加日志），每次记录只追加一行
+"""
+
+import math
+import time
+
+from store import CommandStore
+
+
+class UsageStats:
+    HALF_LIFE = 14 * 86400          # 秒
+    AUTO_WEIGHT = 1.8               # 自动选择所需的最小权重：两次选择间隔不超过约 4.5 天（半衰期 14 天时）
+    AUTO_SHARE = 0.75               # 自动选择所需的权重占比
+
+    def __init__(self, path: str = "usage_stats.json", half_life: float = HALF_LIFE, clock=time.time):
+        # 记录："u:<话>" → {指令: [权重, 时间]}，"k:<指令>" → [权重, 时间]
+        self.store = CommandStore(path)
+        self.half_life = half_life
+        self.clock = clock
+
+    @staticmethod
+    def _norm(utterance: str) -> str:
+        return "".join(utterance.lower().split())
+
+    def _decayed(self, rec, now: float) -> float:
+        if not rec:
+            return 0.0
+        w, t = rec
+        return w * math.exp2(-(now - t) / self.half_life)
+
+    def record(self, utterance: str, key: str):
+        """用户（或自动选择）为这句话选定了 key"""
+        now = self.clock()
+        ukey = "u:" + self._norm(utterance)
+        picks = dict(self.store.get(ukey, {}))
+        picks[key] = [self._decayed(picks.get(key), now) + 1.0, now]
+        self.store[ukey] = picks
+        self.store["k:" + key] = [self._decayed(self.store.get("k:" + key), now) + 1.0, now]
+
+    def scores(self, utterance: str, keys: list[str]) -> dict[str, tuple[float, float]]:
+        """key → (这句话上的权重, 总权重)"""
+        now = self.clock()
+        picks = self.store.get("u:" + self._norm(utterance), {})
+        return {k: (self._decayed(picks.get(k), now), self._decayed(self.store.get("k:" + k), now))
+                for k in keys}
+
+    def rank(self, utterance: str, keys: list[str]) -> list[str]:
+        sc = self.scores(utterance, keys)
+        return sorted(keys, key=lambda k: (-sc[k][0], -sc[k][1]))      # sorted 稳定
+
+    def pick(self, utterance: str, keys: list[str]) -> str | None:
+        """足够确定时返回应自动选择的 key，否则 None"""
+        if not keys:
+            return None
+        sc = self.scores(utterance, keys)
+        best = max(keys, key=lambda k: sc[k][0])
+        w = sc[best][0]
+        total = sum(s[0] for s in sc.values())
+        if w >= self.AUTO_WEIGHT and w >= self.AUTO_SHARE * total:
+            return best
+        return None
+
+    def close(self):
+        self.store.close()
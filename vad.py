@@ -0,0 +1,163 @@
+"""
+语音活动检测（VAD）
+==================
+替代 `listen(timeout=5, phrase_time_limit=5)` 的帧级语音切分：
+• 每帧（默认 30 ms）用 NumPy 计算能量（RMS）与过零率
+• 噪声基底持续自适应：静音帧快速跟踪，语音帧中只缓慢上调
+• 连续若干语音帧判定开始，连续若干静音帧判定结束（比能量阈值的 0.8 s 尾静音更短）
+• 只把语音段交给识别器；过短的段（咔哒声等）直接丢弃，长句不再被 5 s 截断
+• 每段带上触发前的预录音；在常驻会话的环形缓冲区上切分时只记帧序号，段结束时一次取出
+"""
+
+import math
+from collections import deque
+
+import numpy as np
+
+
+def frame_features(frames: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """frames: (n, samples) 的 int16 数组 → 每帧 (RMS, 过零率)"""
+    x = frames.astype(np.float32)
+    rms = np.sqrt(np.mean(x * x, axis=-1))
+    zcr = np.mean(np.signbit(x[..., 1:]) != np.signbit(x[..., :-1]), axis=-1)
+    return rms, zcr
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 帧级判决
+# ────────────────────────────────────────────────────────────────────────────────
+class VoiceActivityDetector:
+    def __init__(self, sample_rate: int, frame_ms: int = 30, ratio: float = 3.0,
+                 min_rms: float = 120.0, max_zcr: float = 0.35, init_frames: int = 10):
+        self.sample_rate = sample_rate
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.frame_bytes = self.frame_samples * 2        # 16-bit 单声道
+        self.ratio = ratio              # 能量超过噪声基底多少倍视为语音
+        self.min_rms = min_rms          # 绝对下限，避免安静环境下过于敏感
+        self.max_zcr = max_zcr          # 过零率过高且能量不突出的帧视为嘶声
+        self.init_frames = init_frames  # 开头若干帧只用于估计噪声
+        self.noise_floor = 0.0
+        self._seen = 0
+        # 逐帧判决用的预分配缓冲区（采集线程每帧调用，不再临时分配数组）
+        self._buf = np.zeros(self.frame_samples, dtype=np.float32)
+        self._sign = np.zeros(self.frame_samples, dtype=bool)
+        self._cross = np.zeros(self.frame_samples - 1, dtype=bool)
+        self._sign_a, self._sign_b = self._sign[1:], self._sign[:-1]
+
+    @property
+    def threshold(self) -> float:
+        return max(self.noise_floor * self.ratio, self.min_rms)
+
+    def _features(self, x: np.ndarray) -> tuple[float, float]:
+        """单帧的 (RMS, 过零率)，与 frame_features 相同，但只用预分配的缓冲区"""
+        if len(x) != self.frame_samples:
+            rms, zcr = frame_features(x)
+            return float(rms), float(zcr)
+        buf = self._buf
+        np.copyto(buf, x, casting="unsafe")
+        rms = math.sqrt(float(np.dot(buf, buf)) / len(buf))
+        np.signbit(buf, out=self._sign)
+        np.not_equal(self._sign_a, self._sign_b, out=self._cross)
+        return rms, np.count_nonzero(self._cross) / len(self._cross)
+
+    def is_speech(self, frame) -> bool:
+        """frame：一帧 16-bit PCM（bytes / memoryview / int16 数组）"""
+        x = frame if isinstance(frame, np.ndarray) else np.frombuffer(frame, dtype=np.int16)
+        rms, zcr = self._features(x)
+        if self._seen < self.init_frames:
+            # 预热：累积均值作为初始噪声基底
+            self._seen += 1
+            self.noise_floor += (rms - self.noise_floor) / self._seen
+            return False
+        thr = self.threshold
+        speech = rms > thr and (zcr < self.max_zcr or rms > thr * 2)
+        # 静音帧快速跟踪环境噪声；语音帧只允许基底缓慢漂移
+        alpha = 0.999 if speech else 0.95
+        self.noise_floor = alpha * self.noise_floor + (1 - alpha) * rms
+        return speech
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 语音段切分
+# ────────────────────────────────────────────────────────────────────────────────
+class SpeechSegmenter:
+    """
+    push(frame, speech, n) 返回 (事件, 帧列表)：
+      (None, [])            静音
+      ("start", [...])      触发开始，附带预录音、触发前的帧与当前帧
+      ("speech", [frame])   语音进行中
+      ("end", [frame])      段结束；完整 PCM 见 self.segment（过短则为 None）
+
+    给定 ring（`audio.AudioRing`）时 n 为帧序号：预录音直接从缓冲区取，可早于开始读取的时刻，
+    段内不保存帧，结束时一次拷出；否则在内部缓存最近的帧作为预录音。
+    """
+
+    def __init__(self, vad: VoiceActivityDetector, start_ms: int = 90, end_ms: int = 300,
+                 pre_roll_ms: int = 300, min_ms: int = 200, max_ms: int = 15000, ring=None):
+        fm = vad.frame_samples * 1000 // vad.sample_rate
+        self.vad = vad
+        self.ring = ring
+        self.start_frames = max(1, start_ms // fm)
+        self.end_frames = max(1, end_ms // fm)
+        self.pre_frames = max(0, pre_roll_ms // fm)
+        self.min_frames = max(1, min_ms // fm)
+        self.max_frames = max(1, max_ms // fm)
+        self._pad = deque(maxlen=self.pre_frames + self.start_frames)
+        self._voiced: list[bytes] = []
+        self._first = 0                 # 有 ring 时：本段第一帧（含预录音）的序号
+        self._count = 0                 # 本段帧数
+        self._lead = 0                  # 其中触发前的预录音帧数
+        self._floor = 0                 # 上一段之后的第一帧，预录音不与上一段重叠
+        self._run = 0                   # 连续语音帧（未触发）/ 连续静音帧（已触发）
+        self.triggered = False
+        self.segment: bytes | None = None
+
+    def reset(self):
+        self._pad.clear()
+        self._voiced = []
+        self._count = 0
+        self._run = 0
+        self.triggered = False
+
+    def push(self, frame, speech: bool | None = None, n: int | None = None):
+        """speech 为已算好的帧判决（如常驻会话已判过），None 时现场计算；n 为缓冲区中的帧序号"""
+        if speech is None:
+            speech = self.vad.is_speech(frame)
+        ring = self.ring if n is not None else None
+        if not self.triggered:
+            if ring is None:
+                self._pad.append(frame)
+            self._run = self._run + 1 if speech else 0
+            if self._run < self.start_frames:
+                return None, []
+            self.triggered = True
+            self._run = 0
+            if ring is None:
+                self._voiced = list(self._pad)
+                self._pad.clear()
+                self._count = len(self._voiced)
+                self._lead = self._count - self.start_frames
+                return "start", list(self._voiced)
+            first = n + 1 - self.start_frames - self.pre_frames
+            self._first = max(first, self._floor, ring.oldest())
+            self._count = n + 1 - self._first
+            self._lead = max(0, self._count - self.start_frames)
+            return "start", ring.frames(self._first, n + 1)
+
+        if ring is None:
+            self._voiced.append(frame)
+        self._count += 1
+        self._run = 0 if speech else self._run + 1
+        if self._run < self.end_frames and self._count - self._lead < self.max_frames:
+            return "speech", [frame]
+        voiced = self._count - self._lead - self._run
+        if voiced < self.min_frames:
+            self.segment = None
+        elif ring is None:
+            self.segment = b"".join(self._voiced)
+        else:
+            # 读取方落后过多时最早的帧可能已被覆盖，从仍有效的位置开始
+            self.segment = ring.read(max(self._first, ring.oldest()), n + 1)
+            self._floor = n + 1
+        self.reset()
+        return "end", [frame]
@@ -0,0 +1,93 @@
+"""
+唤醒词检测
+==========
+唤醒词模式下常驻运行的本地关键词检测，只有听到唤醒词后的那一句话才交给完整识别：
+• 只有 VAD 判为语音的帧才送入检测器，静音时没有任何解码开销
+• Vosk 以“唤醒词 + [unk]”的受限语法解码，搜索空间只有几个字，单核占用很低
+• 检测结果按无声调拼音比对，同音字（“小朱手”）也算命中（需要 pypinyin，否则按原文比对）
+• 离线模型按路径缓存，多次开始/停止不重复加载
+"""
+
+import json
+import threading
+
+from matcher import HAS_PINYIN, to_syllables
+
+try:
+    import vosk
+except ImportError:
+    vosk = None
+
+_models: dict[str, object] = {}
+_models_lock = threading.Lock()
+
+
+class SpotterUnavailable(RuntimeError):
+    pass
+
+
+def load_model(model_path: str):
+    if vosk is None:
+        raise SpotterUnavailable("唤醒词模式需要安装 vosk")
+    with _models_lock:
+        model = _models.get(model_path)
+        if model is None:
+            vosk.SetLogLevel(-1)
+            try:
+                model = _models[model_path] = vosk.Model(model_path)
+            except Exception as e:
+                raise SpotterUnavailable(f"无法加载离线模型: {model_path}") from e
+        return model
+
+
+def parse_phrases(text: str) -> list[str]:
+    """设置里的唤醒词：逗号分隔的多个短语"""
+    return [p.strip() for p in text.replace("，", ",").split(",") if p.strip()]
+
+
+class WakeWordSpotter:
+    def __init__(self, model_path: str, phrases: list[str], sample_rate: int = 16000):
+        if not phrases:
+            raise SpotterUnavailable("未设置唤醒词")
+        self.phrases = phrases
+        self._syllables = [to_syllables(p) for p in phrases] if HAS_PINYIN else []
+        # 中文模型按词切分，逐字放进语法，保证每个字都在词表内
+        grammar = [" ".join(p) for p in phrases] + ["[unk]"]
+        self._rec = vosk.KaldiRecognizer(load_model(model_path), sample_rate,
+                                         json.dumps(grammar, ensure_ascii=False))
+
+    def matches(self, text: str) -> bool:
+        if not text:
+            return False
+        if any(p in text for p in self.phrases):
+            return True
+        if not self._syllables:
+            return False
+        syl = to_syllables(text)
+        for ps in self._syllables:
+            n = len(ps)
+            if any(syl[i:i + n] == ps for i in range(len(syl) - n + 1)):
+                return True
+        return False
+
+    def feed(self, frame: bytes) -> bool:
+        """送入一帧语音，唤醒词出现时返回 True"""
+        if not isinstance(frame, bytes):        # 音频缓冲区的 memoryview；vosk 只接受 bytes
+            frame = bytes(frame)
+        if self._rec.AcceptWaveform(frame):
+            key, raw = "text", self._rec.Result()
+        else:
+            key, raw = "partial", self._rec.PartialResult()
+        return self.matches(json.loads(raw).get(key, "").replace(" ", ""))
+
+    def reset(self):
+        """语音段结束：丢弃解码状态，下一段重新开始"""
+        self._rec.Reset()
+
+    def strip(self, text: str) -> str:
+        """去掉完整识别结果开头残留的唤醒词"""
+        for p in self.phrases:
+            i = text.find(p)
+            if 0 <= i <= 1:
+                return text[i + len(p):].lstrip("，,。 ")
+        return text